@@ -0,0 +1,108 @@
+"""
+Benchmark for sorting and aggregating the library
+
+Builds a synthetic library of TrackInfo records and times common library
+operations (sort by year, sort by artist and album, total duration, tracks
+per genre, bitrate histogram) over a list of records and over the
+columnar LibraryStore.
+
+Usage:
+    python benchmarks/bench_library_store.py [--tracks N] [--artists N]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata import TrackInfo
+from library_store import LibraryStore
+
+GENRES = ["Rock", "Pop", "Jazz", "Electronic", "Hip-Hop", "Classical", "Metal", "Folk"]
+BITRATES = [96, 128, 160, 192, 256, 320]
+
+def generate_tracks(tracks, artists):
+    """
+    Create metadata records for a synthetic library
+    
+    Args:
+        tracks (int): Number of tracks
+        artists (int): Number of distinct artists, ten albums each
+    
+    Returns:
+        list: (path, TrackInfo) pairs
+    """
+    result = []
+    for i in range(tracks):
+        artist = f"Artist {(i * 7919) % artists}"
+        album = f"Album {(i // 12) % (artists * 10)}"
+        path = f"/music/{artist}/{album}/{i % 12 + 1:02d} - Song {i}.mp3"
+        result.append((path, TrackInfo(
+            path, f"Song {i}", artist, album,
+            year=str(1960 + (i * 31) % 60),
+            track=str(i % 12 + 1),
+            genre=GENRES[i % len(GENRES)],
+            duration=120 + (i * 17) % 300,
+            bitrate=BITRATES[i % len(BITRATES)],
+            sample_rate=44100,
+            file_size=4000 + i % 8000,
+        )))
+    return result
+
+def timed(function):
+    """Run function and return its wall time in milliseconds"""
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+def run_records(tracks):
+    """Time the operations on a plain list of records"""
+    records = [metadata for _, metadata in tracks]
+    year = lambda metadata: int(metadata.year) if metadata.year.isdigit() else 0
+    return {
+        'sort by year': timed(lambda: sorted(records, key=year, reverse=True)),
+        'sort by artist, album': timed(lambda: sorted(
+            records, key=lambda m: (m.artist.lower(), m.album.lower()))),
+        'total duration': timed(lambda: sum(m.duration for m in records)),
+        'tracks per genre': timed(lambda: Counter(m.genre for m in records).most_common()),
+        'bitrate histogram': timed(lambda: Counter(
+            min(m.bitrate // 64, 5) for m in records)),
+        'filter genre + year': timed(lambda: [
+            m.file_path for m in records if m.genre == "Jazz" and 1970 <= year(m) <= 1979]),
+    }
+
+def run_store(store):
+    """Time the operations on the columnar store"""
+    return {
+        'sort by year': timed(lambda: store.sort(['year'], descending=True)),
+        'sort by artist, album': timed(lambda: store.sort(['artist', 'album'])),
+        'total duration': timed(lambda: store.total('duration')),
+        'tracks per genre': timed(lambda: store.count_by('genre')),
+        'bitrate histogram': timed(lambda: store.histogram(
+            'bitrate', [0, 64, 128, 192, 256, 320, 100000])),
+        'filter genre + year': timed(lambda: store.paths(
+            store.where('genre', "Jazz") & store.between('year', 1970, 1979))),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark library sorting and aggregation")
+    parser.add_argument('--tracks', type=int, default=500000)
+    parser.add_argument('--artists', type=int, default=5000)
+    args = parser.parse_args()
+    
+    tracks = generate_tracks(args.tracks, args.artists)
+    store = LibraryStore()
+    build = timed(lambda: store.update(tracks))
+    print(f"{args.tracks} tracks, {args.artists} artists; store built in {build:.0f} ms")
+    
+    records = run_records(tracks)
+    columns = run_store(store)
+    print(f"{'operation':24s} {'records':>10s} {'store':>10s}")
+    for name, record_ms in records.items():
+        print(f"{name:24s} {record_ms:8.1f} ms {columns[name]:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
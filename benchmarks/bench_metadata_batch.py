@@ -0,0 +1,104 @@
+"""
+Benchmark for batch metadata extraction
+
+Generates tagged MP3 files and compares parsing them one at a time with
+get_metadata against get_metadata_batch on process pools of growing size.
+The pool is started once before timing, as it is in the player, so the
+numbers show parsing throughput rather than interpreter start-up.
+
+Usage:
+    python benchmarks/bench_metadata_batch.py [--files N] [--workers N ...]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen.id3 import ID3, TIT2, TPE1, TALB, TCON, TRCK
+
+from metadata import MetadataManager
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz frame: header plus silent payload
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+
+def generate_files(root, count, frames):
+    """
+    Create tagged MP3 files
+    
+    Args:
+        root (str): Directory to create them in
+        count (int): Number of files
+        frames (int): Audio frames per file
+    
+    Returns:
+        list: Paths of the created files
+    """
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"{i:06d} - Track.mp3")
+        with open(path, 'wb') as f:
+            f.write(MP3_FRAME * frames)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text=f"Song {i}"))
+        tags.add(TPE1(encoding=3, text=f"Artist {i % 100}"))
+        tags.add(TALB(encoding=3, text=f"Album {i % 1000}"))
+        tags.add(TCON(encoding=3, text="Rock"))
+        tags.add(TRCK(encoding=3, text=str(i % 12 + 1)))
+        tags.save(path)
+        paths.append(path)
+    return paths
+
+def run_serial(paths):
+    """Parse every file on the calling thread"""
+    manager = MetadataManager()
+    start = time.perf_counter()
+    for path in paths:
+        manager.get_metadata(path)
+    return time.perf_counter() - start
+
+def run_batch(paths, workers):
+    """Parse every file through get_metadata_batch on a warm pool"""
+    manager = MetadataManager()
+    manager.max_workers = workers
+    manager.parallel_threshold = 0
+    
+    # Start the worker processes outside the timed section
+    list(manager.get_metadata_batch(paths[:workers * manager.chunk_size]))
+    manager.invalidate(paths)
+    
+    start = time.perf_counter()
+    count = sum(1 for _ in manager.get_metadata_batch(paths))
+    elapsed = time.perf_counter() - start
+    manager.shutdown()
+    assert count == len(paths)
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch metadata extraction")
+    parser.add_argument('--files', type=int, default=4000)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, 8, 16, os.cpu_count() or 1}))
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix="retrojukebox_bench_")
+    try:
+        paths = generate_files(root, args.files, args.frames)
+        print(f"Generated {len(paths)} MP3 files on {os.cpu_count()} CPUs")
+        
+        serial = run_serial(paths)
+        print(f"serial get_metadata : {serial:7.2f} s")
+        for workers in args.workers:
+            elapsed = run_batch(paths, workers)
+            print(f"batch, {workers:2d} workers   : {elapsed:7.2f} s  "
+                  f"({serial / elapsed:5.2f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for concurrent multi-root scanning on slow filesystems
+
+Generates several library roots and walks them with LibraryScanner using
+an increasing number of worker threads. Every stat call is delayed to
+simulate a network mount where each metadata round trip costs time.
+
+Usage:
+    python benchmarks/bench_parallel_scan.py [--roots N] [--stat-delay MS]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import LibraryScanner
+from bench_scan import generate_tree, SUPPORTED_FORMATS
+
+class SlowMountScanner(LibraryScanner):
+    """LibraryScanner whose stat calls sleep like a remote filesystem"""
+    
+    def __init__(self, *args, stat_delay=0.001, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stat_delay = stat_delay
+    
+    def stat_path(self, path):
+        time.sleep(self.stat_delay)
+        return super().stat_path(path)
+    
+    def stat_entry(self, entry, follow_symlinks=True):
+        time.sleep(self.stat_delay)
+        return super().stat_entry(entry, follow_symlinks=follow_symlinks)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent library scanning")
+    parser.add_argument('--roots', type=int, default=3)
+    parser.add_argument('--artists', type=int, default=20)
+    parser.add_argument('--albums', type=int, default=4)
+    parser.add_argument('--tracks', type=int, default=10)
+    parser.add_argument('--stat-delay', type=float, default=1.0, help="milliseconds per stat")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+    
+    base = tempfile.mkdtemp(prefix="retrojukebox_bench_")
+    try:
+        roots = []
+        created = 0
+        for r in range(args.roots):
+            root = os.path.join(base, f"root{r}")
+            created += generate_tree(root, args.artists, args.albums, args.tracks)
+            roots.append(root)
+        print(f"Generated {created} music files in {args.roots} roots, "
+              f"{args.stat_delay:.1f} ms per stat")
+        
+        reference = None
+        baseline = None
+        for workers in args.workers:
+            scanner = SlowMountScanner(SUPPORTED_FORMATS, max_workers=workers,
+                                       stat_delay=args.stat_delay / 1000.0)
+            start = time.perf_counter()
+            files = sorted(path for path, _, _, _ in scanner.walk(roots))
+            elapsed = time.perf_counter() - start
+            
+            # The merged library must not depend on the thread count
+            if reference is None:
+                reference = files
+                baseline = elapsed
+            assert files == reference, f"{workers} workers produced a different library"
+            
+            print(f"{workers:3d} workers : {elapsed * 1000:9.1f} ms  "
+                  f"({baseline / elapsed:5.2f}x)")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark for exchanging huge playlists with other players
+
+Builds a playlist of synthetic track paths, exports it through
+PlaylistManager as M3U8 and PLS, imports each file back and checks that
+the round trip keeps every track in order. One of the M3U8 files uses
+paths relative to the playlist, as other players often write them.
+
+Usage:
+    python benchmarks/bench_playlist_formats.py [--tracks N] [--directory DIR]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist import PlaylistManager
+from playlist_formats import write_playlist
+
+def generate_tracks(directory, tracks):
+    """
+    Create track paths under a music directory, twelve per album
+    
+    Args:
+        directory (str): Music directory
+        tracks (int): Number of tracks
+    
+    Returns:
+        list: Absolute track paths
+    """
+    return [os.path.join(directory, f"Artist {i // 1200}", f"Album {i // 12}",
+                         f"{i % 12 + 1:02d} - Song {i}.mp3")
+            for i in range(tracks)]
+
+def timed(function):
+    """Run function and return its result and wall time in seconds"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark M3U/PLS playlist import and export")
+    parser.add_argument('--tracks', type=int, default=1000000)
+    parser.add_argument('--directory', help="Scratch directory (default: a temporary one)")
+    args = parser.parse_args()
+    
+    directory = args.directory or tempfile.mkdtemp()
+    music_dir = os.path.join(directory, "Music")
+    os.makedirs(music_dir, exist_ok=True)
+    try:
+        tracks = generate_tracks(music_dir, args.tracks)
+        manager = PlaylistManager()
+        manager.create_playlist("Huge")
+        _, seconds = timed(lambda: manager.add_tracks_to_playlist("Huge", tracks))
+        print(f"{args.tracks} tracks added in {seconds:.2f} s")
+        
+        # Relative entries, resolved against the playlist's directory on import
+        relative_path = os.path.join(music_dir, "Relative.m3u8")
+        write_playlist(relative_path, (track[len(music_dir) + 1:] for track in tracks))
+        
+        print(f"{'file':16s} {'size':>9s} {'export':>9s} {'import':>9s}")
+        for file_name in ("Exported.m3u8", "Exported.pls", "Relative.m3u8"):
+            file_path = os.path.join(music_dir, file_name)
+            if file_name == "Relative.m3u8":
+                export_column = f"{'-':>9s}"
+            else:
+                _, export_time = timed(lambda: manager.export_playlist("Huge", file_path))
+                export_column = f"{export_time:7.2f} s"
+            name, import_time = timed(lambda: manager.import_playlist(file_path))
+            
+            imported = manager.get_playlist(name)
+            if imported is None or imported.get_tracks() != tracks:
+                raise SystemExit(f"Round trip through {file_name} lost or reordered tracks")
+            manager.delete_playlist(name)
+            size_mb = os.path.getsize(file_path) / 1e6
+            print(f"{file_name:16s} {size_mb:6.1f} MB {export_column} {import_time:7.2f} s")
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark for the library scanner
+
+Generates a synthetic music tree and compares the single-pass scandir
+scanner in FileManager with the original two-pass os.walk scanner.
+
+Usage:
+    python benchmarks/bench_scan.py [--artists N] [--albums N] [--tracks N]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication, QEventLoop
+
+from file_manager import FileManager
+from library_index import LibraryIndex
+
+SUPPORTED_FORMATS = ['.mp3', '.flac', '.wav', '.ogg']
+
+def generate_tree(root, artists, albums, tracks):
+    """
+    Create an artist/album/track tree with some non-music clutter
+    
+    Returns:
+        int: Number of music files created
+    """
+    count = 0
+    for a in range(artists):
+        for b in range(albums):
+            album_dir = os.path.join(root, f"Artist {a:03d}", f"Album {b:02d}")
+            os.makedirs(album_dir, exist_ok=True)
+            for t in range(tracks):
+                ext = SUPPORTED_FORMATS[t % len(SUPPORTED_FORMATS)]
+                open(os.path.join(album_dir, f"{t:02d} - Track{ext}"), 'wb').close()
+                count += 1
+            # Non-music files that the scanner has to skip
+            open(os.path.join(album_dir, "cover.jpg"), 'wb').close()
+            open(os.path.join(album_dir, "notes.txt"), 'wb').close()
+    return count
+
+def legacy_scan(directory_path):
+    """The original two-pass os.walk scanner, kept here for comparison"""
+    music_files = []
+    total_files = 0
+    found_files = 0
+    for root, _, files in os.walk(directory_path):
+        for file in files:
+            if any(file.lower().endswith(fmt) for fmt in SUPPORTED_FORMATS):
+                total_files += 1
+    for root, _, files in os.walk(directory_path):
+        for file in files:
+            if any(file.lower().endswith(fmt) for fmt in SUPPORTED_FORMATS):
+                music_files.append(os.path.join(root, file))
+                found_files += 1
+    music_files.sort()
+    return music_files
+
+def run_scan(manager, root):
+    """
+    Run a background scan to completion on a local event loop
+    
+    Returns:
+        tuple: (sorted file list, seconds until the first 100 tracks arrived)
+    """
+    loop = QEventLoop()
+    manager.scan_finished.connect(loop.quit)
+    manager.scan_directory(root)
+    loop.exec_()
+    manager.scan_finished.disconnect(loop.quit)
+    return list(manager.get_files()), manager.scan_metrics.get('first_results', 0.0)
+
+def best_of(func, repeat):
+    """Run func several times and return (best time, last result)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the library scanner")
+    parser.add_argument('--artists', type=int, default=200)
+    parser.add_argument('--albums', type=int, default=5)
+    parser.add_argument('--tracks', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    
+    root = tempfile.mkdtemp(prefix="retrojukebox_bench_")
+    try:
+        created = generate_tree(root, args.artists, args.albums, args.tracks)
+        print(f"Generated {created} music files in {root}")
+        
+        legacy_time, legacy_files = best_of(lambda: legacy_scan(root), args.repeat)
+        
+        # Single traversal thread: this compares the traversal itself, see
+        # bench_parallel_scan.py for concurrent scanning of slow mounts
+        # Watching is off: legacy_scan sets up no watches and the watcher
+        # registration is not part of the traversal being compared
+        manager = FileManager()
+        manager.scan_workers = 1
+        manager.set_watch_enabled(False)
+        new_time, (new_files, first_results) = best_of(lambda: run_scan(manager, root), args.repeat)
+        
+        assert legacy_files == new_files, "Scanners disagree on the file list"
+        
+        # Rescan of an unchanged tree with directory summaries in the index
+        index = LibraryIndex(os.path.join(root, "library.db"))
+        indexed_manager = FileManager(index)
+        indexed_manager.scan_workers = 1
+        indexed_manager.set_watch_enabled(False)
+        run_scan(indexed_manager, root)
+        rescan_time, (rescan_files, _) = best_of(lambda: run_scan(indexed_manager, root), args.repeat)
+        index.close()
+        
+        assert legacy_files == rescan_files, "Indexed rescan disagrees on the file list"
+        
+        print(f"two-pass os.walk : {legacy_time * 1000:8.1f} ms")
+        print(f"single-pass scan : {new_time * 1000:8.1f} ms")
+        print(f"first 100 tracks : {first_results * 1000:8.1f} ms")
+        print(f"indexed rescan   : {rescan_time * 1000:8.1f} ms")
+        print(f"speedup          : {legacy_time / new_time:8.2f}x")
+        print(f"rescan speedup   : {legacy_time / rescan_time:8.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark for search-as-you-type over the library
+
+Builds a synthetic library from a small vocabulary, indexes it with
+SearchIndex and times each keystroke of a few queries against the old
+approach of a lowercase substring check on every track's display text,
+then times the same keystrokes as fuzzy searches, including misspelt
+queries only those can answer.
+
+Usage:
+    python benchmarks/bench_search.py [--tracks N] [--seed N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata import TrackInfo
+from search_index import SearchIndex
+
+WORDS = ("love night heart dream fire rain blue road home light time city girl "
+         "world river song dance summer moon wild gold black star ghost shadow "
+         "angel storm sun sky ocean young lost forever midnight electric paper").split()
+
+QUERIES = ["midnight river", "beatles", "blue moon", "ghost sta", "x"]
+
+FUZZY_QUERIES = ["midnigth rivr", "beatels", "elecrtic"]
+
+def generate_tracks(tracks, seed):
+    """
+    Create metadata records for a synthetic library
+    
+    Args:
+        tracks (int): Number of tracks
+        seed (int): Random seed
+    
+    Returns:
+        list: (path, TrackInfo) pairs
+    """
+    rng = random.Random(seed)
+    artists = [" ".join(rng.sample(WORDS, 2)).title() for _ in range(max(1, tracks // 100))]
+    albums = [" ".join(rng.sample(WORDS, 2)).title() for _ in range(max(1, tracks // 12))]
+    result = []
+    for i in range(tracks):
+        artist = artists[i // 100 % len(artists)]
+        album = albums[i // 12 % len(albums)]
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 4))).title()
+        path = f"/music/{artist}/{album}/{i % 12 + 1:02d} - {title}.mp3"
+        result.append((path, TrackInfo(path, title, artist, album)))
+    # A handful of tracks only the "beatles" query finds
+    for i in range(0, tracks, tracks // 20 or 1):
+        path, metadata = result[i]
+        metadata.artist = "The Beatles"
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search-as-you-type")
+    parser.add_argument('--tracks', type=int, default=300000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    
+    tracks = generate_tracks(args.tracks, args.seed)
+    texts = [f"{metadata.title} - {metadata.artist}" for _, metadata in tracks]
+    
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.update(tracks)
+    print(f"{args.tracks} tracks indexed in {time.perf_counter() - start:.1f} s")
+    
+    print(f"{'keystroke':20s} {'matches':>8s} {'scan':>9s} {'index':>9s} "
+          f"{'fuzzy':>8s} {'fuzzy':>9s}")
+    for query in QUERIES + FUZZY_QUERIES:
+        for length in range(1, len(query) + 1):
+            typed = query[:length]
+            start = time.perf_counter()
+            needle = typed.lower()
+            scanned = sum(1 for text in texts if needle in text.lower())
+            scan_ms = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            _, total = index.search(typed)
+            index_ms = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            _, fuzzy_total = index.search(typed, fuzzy=True)
+            fuzzy_ms = (time.perf_counter() - start) * 1000
+            print(f"{typed!r:20s} {total:8d} {scan_ms:7.1f} ms {index_ms:6.1f} ms "
+                  f"{fuzzy_total:8d} {fuzzy_ms:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
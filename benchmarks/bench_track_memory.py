@@ -0,0 +1,84 @@
+"""
+Benchmark for the memory used by in-memory track metadata
+
+Builds metadata for a synthetic library the way MetadataManager gets it
+from the library index (one JSON document per track) and compares keeping
+it as plain dicts with keeping it as interned TrackInfo records.
+
+Usage:
+    python benchmarks/bench_track_memory.py [--tracks N] [--artists N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata import TrackInfo
+
+GENRES = ["Rock", "Pop", "Jazz", "Electronic", "Hip-Hop", "Classical", "Metal", "Folk"]
+
+def generate_documents(tracks, artists):
+    """
+    Yield stored metadata documents for a synthetic library
+    
+    Args:
+        tracks (int): Number of tracks
+        artists (int): Number of distinct artists, ten albums each
+    
+    Yields:
+        str: JSON metadata document as stored in the library index
+    """
+    for i in range(tracks):
+        artist = f"Artist {i % artists}"
+        album = f"Album {(i // 12) % (artists * 10)}"
+        yield json.dumps({
+            'title': f"Song {i}",
+            'artist': artist,
+            'album': album,
+            'year': str(1960 + i % 60),
+            'track': str(i % 12 + 1),
+            'genre': GENRES[i % len(GENRES)],
+            'duration': 180 + i % 240,
+            'file_path': f"/music/{artist}/{album}/{i % 12 + 1:02d} - Song {i}.mp3",
+            'bitrate': 320,
+            'sample_rate': 44100,
+            'channels': 2,
+            'layer': 3,
+            'version': 1,
+            'file_size': 8000 + i % 4000,
+        })
+
+def measure(tracks, artists, convert):
+    """
+    Measure the memory retained by the converted records
+    
+    Returns:
+        int: Bytes still allocated once the documents were converted
+    """
+    tracemalloc.start()
+    records = [convert(json.loads(doc)) for doc in generate_documents(tracks, artists)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(records) == tracks
+    return retained
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark track metadata memory use")
+    parser.add_argument('--tracks', type=int, default=300000)
+    parser.add_argument('--artists', type=int, default=3000)
+    args = parser.parse_args()
+    
+    dict_bytes = measure(args.tracks, args.artists, lambda data: data)
+    record_bytes = measure(args.tracks, args.artists, TrackInfo.from_dict)
+    
+    print(f"{args.tracks} tracks, {args.artists} artists")
+    print(f"dict per track   : {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / args.tracks:6.0f} B/track)")
+    print(f"TrackInfo        : {record_bytes / 2**20:8.1f} MiB ({record_bytes / args.tracks:6.0f} B/track)")
+    print(f"saved            : {(1 - record_bytes / dict_bytes) * 100:8.1f} %")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Duplicates module for finding identical tracks in the music library
+"""
+
+import os
+import mmap
+import hashlib
+from collections import defaultdict
+
+class DuplicateFinder:
+    """
+    Finds files with identical content using staged hashing
+    
+    Files are first grouped by size, which costs nothing since the scanner
+    already has it. Files sharing a size are hashed over their first and
+    last EDGE_SIZE bytes, and only files that still collide get a full
+    content hash. Most non-duplicates are ruled out without reading a
+    byte, and nearly all of the rest after reading 128 KiB.
+    
+    Both hashes are cached in the library index next to the size and mtime
+    they were computed for, so a rerun only reads files that changed.
+    """
+    
+    # Bytes hashed at the start and at the end of each file
+    EDGE_SIZE = 64 * 1024
+    
+    # Read buffer for full hashes when a file cannot be memory-mapped
+    BUFFER_SIZE = 1024 * 1024
+    
+    def __init__(self, library_index=None):
+        """
+        Initialize the duplicate finder
+        
+        Args:
+            library_index (LibraryIndex): Optional index caching computed hashes
+        """
+        self.library_index = library_index
+        
+        # Files hashed (not served from the cache) by the last run
+        self.partial_hashed = 0
+        self.full_hashed = 0
+    
+    def find_duplicates(self, paths, file_stats=None, cancel_event=None):
+        """
+        Find groups of files with identical content
+        
+        Args:
+            paths (list): Files to compare
+            file_stats (dict): Optional path -> (size, mtime) from the scan,
+                saves a stat per file
+            cancel_event (threading.Event): Set to stop early
+        
+        Returns:
+            list: Groups of identical paths, each sorted, largest files first
+        """
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        file_stats = file_stats or {}
+        
+        # Stage 1: group by size
+        by_size = defaultdict(list)
+        stats = {}
+        for path in paths:
+            stat = file_stats.get(path)
+            if stat is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                stat = (st.st_size, st.st_mtime)
+            # Empty files are all "identical" but not duplicate rips
+            if stat[0] > 0:
+                stats[path] = stat
+                by_size[stat[0]].append(path)
+        
+        candidates = [path for group in by_size.values() if len(group) > 1 for path in group]
+        if not candidates:
+            return []
+        
+        cached = {}
+        if self.library_index is not None:
+            cached = self.library_index.get_hashes(candidates)
+        
+        new_hashes = {}
+        
+        def cached_hash(path, column):
+            entry = cached.get(path)
+            if entry is None or (entry[0], entry[1]) != stats[path]:
+                return None
+            return entry[column]
+        
+        try:
+            # Stage 2: hash the first and last EDGE_SIZE bytes
+            by_partial = defaultdict(list)
+            for size, group in by_size.items():
+                if len(group) < 2:
+                    continue
+                for path in group:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return []
+                    partial = cached_hash(path, 2)
+                    if partial is None:
+                        try:
+                            partial = self._partial_hash(path, size)
+                        except OSError:
+                            continue
+                        self.partial_hashed += 1
+                        new_hashes[path] = [partial, None]
+                    by_partial[(size, partial)].append(path)
+            
+            # Stage 3: hash whole files that still collide
+            by_content = defaultdict(list)
+            for (size, partial), group in by_partial.items():
+                if len(group) < 2:
+                    continue
+                for path in group:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return []
+                    if size <= 2 * self.EDGE_SIZE:
+                        # The edges already covered the whole file
+                        content = partial
+                    else:
+                        content = cached_hash(path, 3)
+                        if content is None:
+                            try:
+                                content = self._full_hash(path)
+                            except OSError:
+                                continue
+                            self.full_hashed += 1
+                            new_hashes.setdefault(path, [partial, None])[1] = content
+                    by_content[(size, content)].append(path)
+        finally:
+            if self.library_index is not None and new_hashes:
+                self.library_index.store_hashes([
+                    (path, stats[path][0], stats[path][1], partial, content)
+                    for path, (partial, content) in new_hashes.items()
+                ])
+        
+        groups = [(size, sorted(group)) for (size, _), group in by_content.items()
+                  if len(group) > 1]
+        groups.sort(key=lambda item: (-item[0], item[1]))
+        return [group for _, group in groups]
+    
+    def _partial_hash(self, path, size):
+        """Hash the size and the first and last EDGE_SIZE bytes of a file"""
+        digest = hashlib.sha1(str(size).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read(self.EDGE_SIZE))
+            if size > self.EDGE_SIZE:
+                f.seek(max(self.EDGE_SIZE, size - self.EDGE_SIZE))
+                digest.update(f.read(self.EDGE_SIZE))
+        return digest.hexdigest()
+    
+    def _full_hash(self, path):
+        """Hash a whole file, memory-mapped where possible"""
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+                    return digest.hexdigest()
+            except (ValueError, OSError):
+                # Not mappable (e.g. some network filesystems): large reads instead
+                f.seek(0)
+                buffer = bytearray(self.BUFFER_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+        return digest.hexdigest()
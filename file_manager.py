@@ -3,65 +3,689 @@ File Manager module for managing local music files
 """
 
 import os
-from PyQt5.QtCore import QObject, pyqtSignal
+import time
+import bisect
+import threading
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from scanner import LibraryScanner, ScanRules
+from duplicates import DuplicateFinder
 
 class FileManager(QObject):
     """
     Class to handle browsing and managing local music files
+    
+    Scans run on a background thread and stream their results through
+    scan_batch in small batches, so the library can fill while the tree is
+    still being read. Shallow directories and directories requested with
+    prioritize_directory are read first; the time until the first
+    FIRST_RESULTS_COUNT tracks reach the GUI is recorded in scan_metrics.
+    Each root can carry include/exclude glob rules; excluded directories
+    are pruned before they are read.
+    
+    After a scan the library directories are watched for changes. Bursts of
+    changes are debounced and applied as one incremental update through
+    library_changed; directories the watcher cannot take (e.g. when the
+    inotify watch limit is exhausted) are polled instead.
     """
-    scan_finished = pyqtSignal(list)
+    # Path lists travel as object: a list signature converts every element
+    # to a QVariant and back on each emit
+    scan_started = pyqtSignal(list)  # library roots
+    scan_batch = pyqtSignal(object)  # list of paths
+    scan_finished = pyqtSignal(object)  # list of paths
     scan_progress = pyqtSignal(int, int)  # progress, total
+    library_changed = pyqtSignal(object, object)  # added or changed paths, removed paths
+    duplicates_found = pyqtSignal(list)  # groups of identical paths
     error = pyqtSignal(str)
     
-    def __init__(self):
+    # Internal signals carrying the scan generation, emitted from the worker thread
+    _batch_ready = pyqtSignal(int, object, int, int)
+    _scan_done = pyqtSignal(int, object)
+    _scan_failed = pyqtSignal(int, str)
+    _refresh_done = pyqtSignal(int, object, object, object)
+    _duplicates_done = pyqtSignal(list, str)  # groups, error message
+    
+    # Number of tracks whose arrival time is tracked as time-to-first-results
+    FIRST_RESULTS_COUNT = 100
+    
+    def __init__(self, library_index=None, config_manager=None):
+        """
+        Initialize the file manager
+        
+        Args:
+            library_index (LibraryIndex): Optional persistent index that
+                records the stat data of every scanned file
+            config_manager (ConfigManager): Optional configuration holding
+                the include/exclude rules of each library root
+        """
         super().__init__()
+        self.library_index = library_index
+        self.config_manager = config_manager
+        self.scan_rules = {}  # root -> (include, exclude) when there is no config
         # Extended format support
         self.supported_formats = ['.mp3', '.flac', '.wav', '.ogg']
         self.music_files = []
+        self.file_stats = {}  # path -> (size, mtime) captured during the scan
         self.current_directory = None
+        self.library_roots = []
+        self.scan_workers = 4  # threads reading directories concurrently
+        self.batch_interval = 0.05  # seconds between scan_batch emissions
+        self.batch_size = 500  # maximum files per scan_batch
+        self.checkpoint_interval = 2.0  # seconds between saved scan checkpoints
+        
+        # Background scan state
+        self._scan_thread = None
+        self._cancel_event = None
+        self._suspend_event = None
+        self._scanner = None
+        self._generation = 0
+        self._scan_start_time = 0.0
+        self.scan_metrics = {}
+        
+        # Live library updates
+        self.watch_enabled = True
+        self.watch_debounce = 500  # ms of quiet before queued changes are applied
+        self.poll_interval = 10000  # ms between polls of unwatched directories
+        self._library_dirs = []
+        self._dirty_dirs = set()
+        self._polled_dirs = {}  # directory -> mtime for directories polled instead of watched
+        self._refresh_thread = None
+        self._duplicates_thread = None
+        
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.timeout.connect(self._apply_pending_changes)
+        
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self._poll_directories)
+        
+        self._batch_ready.connect(self._on_batch_ready)
+        self._scan_done.connect(self._on_scan_done)
+        self._scan_failed.connect(self._on_scan_failed)
+        self._refresh_done.connect(self._on_refresh_done)
+        self._duplicates_done.connect(self._on_duplicates_done)
+    
+    @staticmethod
+    def _collapse_dirs(directories):
+        """
+        Drop directories nested inside another one of the list
+        
+        Args:
+            directories (iterable): Directory paths
+            
+        Returns:
+            list: Sorted topmost directories
+        """
+        result = []
+        for directory in sorted(set(directories)):
+            if result and directory.startswith(os.path.join(result[-1], "")):
+                continue
+            result.append(directory)
+        return result
     
     def scan_directory(self, directory_path):
         """
-        Scan a directory for music files
+        Start scanning a directory for music files in the background
         
         Args:
             directory_path (str): Path to the directory to scan
         """
+        self.scan_directories([directory_path])
+    
+    def scan_directories(self, directories):
+        """
+        Start scanning several library roots as one library
+        
+        Any scan that is still running is cancelled first. The roots are
+        walked concurrently and merged into one sorted file list. Results
+        arrive through scan_batch while the scan runs and scan_finished at
+        the end.
+        
+        Args:
+            directories (list): Paths of the library roots
+        """
+        self.cancel_scan()
+        self.stop_watching()
+        
         self.music_files = []
-        self.current_directory = directory_path
+        self.file_stats = {}
         
-        try:
+        roots = []
+        for directory_path in directories:
             if not os.path.exists(directory_path):
                 self.error.emit(f"Directory not found: {directory_path}")
-                return
-                
-            # Walk through directory and find supported music files
-            total_files = 0
+                continue
+            roots.append(os.path.normpath(directory_path))
+        roots = self._collapse_dirs(roots)
+        
+        self.library_roots = roots
+        self.current_directory = roots[0] if roots else None
+        if not roots:
+            return
+        
+        # A new scan replaces whatever an interrupted one left behind
+        if self.library_index is not None:
+            self.library_index.clear_checkpoint()
+        self._start_scan(roots)
+    
+    def resume_scan(self):
+        """
+        Resume a scan that was interrupted by closing the player
+        
+        Directories completed before the interruption are listed straight
+        from the library index; only the saved frontier is walked again.
+        
+        Returns:
+            bool: True if an interrupted scan was found and resumed
+        """
+        if self.library_index is None or self.is_scanning():
+            return False
+        
+        checkpoint = self.library_index.load_checkpoint()
+        if checkpoint is None:
+            return False
+        
+        roots, pending, completed = checkpoint
+        roots = [root for root in roots if os.path.isdir(root)]
+        if not roots:
+            self.library_index.clear_checkpoint()
+            return False
+        
+        self.cancel_scan()
+        self.stop_watching()
+        
+        self.music_files = []
+        self.file_stats = {}
+        self.library_roots = roots
+        self.current_directory = roots[0]
+        self._start_scan(roots, (pending, completed))
+        return True
+    
+    def _start_scan(self, roots, checkpoint=None):
+        """
+        Start the scan worker thread
+        
+        Args:
+            roots (list): Normalized library roots
+            checkpoint (tuple): (pending, completed) to resume from, if any
+        """
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        self._suspend_event = threading.Event()
+        self._scanner = self._create_scanner()
+        self._scan_thread = threading.Thread(
+            target=self._run_scan,
+            args=(self._scanner, roots, self._generation, self._cancel_event,
+                  self._suspend_event, checkpoint),
+            daemon=True
+        )
+        self.scan_metrics = {}
+        self._scan_start_time = time.monotonic()
+        
+        # Listeners may call prioritize_directory before the walk starts
+        self.scan_started.emit(roots)
+        self._scan_thread.start()
+    
+    def get_scan_rules(self, root):
+        """
+        Get the include/exclude glob rules applied below a library root
+        
+        Args:
+            root (str): Library root
+            
+        Returns:
+            tuple: (include, exclude) lists of glob patterns
+        """
+        if self.config_manager is not None:
+            return self.config_manager.get_library_rules(root)
+        return self.scan_rules.get(os.path.normpath(root), ([], []))
+    
+    def set_scan_rules(self, root, include, exclude):
+        """
+        Set the include/exclude glob rules of a library root
+        
+        The rules take effect with the next scan. Excluded directories are
+        never read, so large non-music subtrees cost nothing.
+        
+        Args:
+            root (str): Library root
+            include (list): Glob patterns files must match, empty for all
+            exclude (list): Glob patterns of files and directories to skip
+        """
+        if self.config_manager is not None:
+            self.config_manager.set_library_rules(root, include, exclude)
+            self.config_manager.save_config()
+        else:
+            self.scan_rules[os.path.normpath(root)] = (list(include), list(exclude))
+    
+    def _create_scanner(self):
+        """Create a scanner applying the rules of the current library roots"""
+        rules = [ScanRules(root, *self.get_scan_rules(root)) for root in self.library_roots]
+        return LibraryScanner(self.supported_formats, self.library_index,
+                              self.scan_workers, rules)
+    
+    def prioritize_directory(self, directory):
+        """
+        Ask the running scan to read a directory before anything else
+        
+        Args:
+            directory (str): Directory whose tracks should appear first
+        """
+        if self._scanner is not None:
+            self._scanner.prioritize(directory)
+    
+    def cancel_scan(self):
+        """Cancel the running scan, if any, and drop its pending results"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        # Results still queued from the old scan are ignored by generation
+        self._generation += 1
+        self._scan_thread = None
+        self._cancel_event = None
+        self._suspend_event = None
+        self._scanner = None
+        self._refresh_thread = None
+    
+    def suspend_scan(self, timeout=2.0):
+        """
+        Stop the running scan and checkpoint it so resume_scan can finish it
+        
+        Args:
+            timeout (float): Seconds to wait for the worker to save its state
+        """
+        thread = self._scan_thread
+        if self._suspend_event is not None:
+            self._suspend_event.set()
+        self.cancel_scan()
+        if thread is not None:
+            thread.join(timeout)
+    
+    def is_scanning(self):
+        """
+        Check whether a scan is in progress
+        
+        Returns:
+            bool: True while a background scan is running
+        """
+        return self._scan_thread is not None and self._scan_thread.is_alive()
+    
+    def _run_scan(self, scanner, roots, generation, cancel_event, suspend_event,
+                  checkpoint=None):
+        """
+        Worker thread body: walk the roots and emit time-bounded batches
+        
+        Args:
+            scanner (LibraryScanner): Scanner for this scan
+            roots (list): Root directories to walk
+            generation (int): Scan generation used to discard stale results
+            cancel_event (threading.Event): Set when the scan is cancelled
+            suspend_event (threading.Event): Set before cancel_event when the
+                scan should be checkpointed instead of dropped
+            checkpoint (tuple): (pending, completed) to resume from, if any
+        """
+        try:
+            batch = []
             found_files = 0
+            last_flush = time.monotonic()
+            last_checkpoint = last_flush
             
-            # First pass to count files
-            for root, _, files in os.walk(directory_path):
-                for file in files:
-                    if any(file.lower().endswith(fmt) for fmt in self.supported_formats):
-                        total_files += 1
+            seen_paths = set()
             
-            # Second pass to collect files
-            for root, _, files in os.walk(directory_path):
-                for file in files:
-                    if any(file.lower().endswith(fmt) for fmt in self.supported_formats):
-                        full_path = os.path.join(root, file)
-                        self.music_files.append(full_path)
-                        found_files += 1
-                        self.scan_progress.emit(found_files, total_files)
+            walk_roots = roots
+            if checkpoint is not None:
+                pending, completed = checkpoint
+                scanner.preload(roots)
+                scanner.resume(pending, completed)
+                walk_roots = []
+                
+                # Completed directories were fully indexed before the interruption
+                completed = set(completed)
+                for root in roots:
+                    for path, size, mtime in self.library_index.get_files_under(root):
+                        if os.path.dirname(path) in completed:
+                            batch.append((path, size, mtime, True))
+                            seen_paths.add(path)
+                            found_files += 1
+                            if len(batch) >= self.batch_size:
+                                self._flush_batch(generation, scanner, batch, found_files,
+                                                  scanner.estimate_total(found_files))
+                                batch = []
             
-            # Sort files by name
-            self.music_files.sort()
+            # Only pruning the index needs the set of paths seen
+            track_seen = self.library_index is not None
+            for item in scanner.walk(walk_roots, cancel_event):
+                batch.append(item)
+                if track_seen:
+                    seen_paths.add(item[0])
+                found_files += 1
+                
+                # The first results go out as soon as there are enough of them
+                first_results = found_files == self.FIRST_RESULTS_COUNT and len(batch) == found_files
+                
+                now = time.monotonic()
+                if (first_results or len(batch) >= self.batch_size
+                        or now - last_flush >= self.batch_interval):
+                    # One progress update per batch instead of one per file
+                    self._flush_batch(generation, scanner, batch, found_files,
+                                      scanner.estimate_total(found_files))
+                    batch = []
+                    last_flush = now
+                    
+                    if (self.library_index is not None and not cancel_event.is_set()
+                            and now - last_checkpoint >= self.checkpoint_interval):
+                        self._save_checkpoint(scanner, roots)
+                        last_checkpoint = now
+            
+            if cancel_event.is_set():
+                if suspend_event.is_set() and self.library_index is not None:
+                    # Keep what was found so far; nobody listens for the batch any more
+                    self._flush_batch(generation, scanner, batch, found_files, found_files)
+                    self._save_checkpoint(scanner, roots)
+                return
+            
+            self._flush_batch(generation, scanner, batch, found_files, found_files)
+            
+            self._prune_index(roots, seen_paths, scanner)
+            if self.library_index is not None:
+                self.library_index.clear_checkpoint()
+            self._scan_done.emit(generation, sorted(scanner.visited_dirs))
+        
+        except Exception as e:
+            self._scan_failed.emit(generation, f"Error scanning directory: {str(e)}")
+    
+    def _save_checkpoint(self, scanner, roots):
+        """
+        Persist the scan frontier and newly completed directories
+        
+        The frontier is captured before the completed directories so a
+        directory finishing in between is recorded twice rather than lost.
+        """
+        pending = scanner.frontier.pending()
+        completed = scanner.take_completed_dirs()
+        self.library_index.save_checkpoint(roots, pending, completed)
+    
+    def _prune_index(self, roots, seen_paths, scanner):
+        """
+        Forget indexed files and directories that disappeared since the last scan
+        
+        Args:
+            roots (list): Directories that were walked completely
+            seen_paths (set): Music files found under the roots
+            scanner (LibraryScanner): Scanner that walked the roots
+        """
+        if self.library_index is None:
+            return
+        
+        visited_dirs = scanner.visited_dirs
+        for root in roots:
+            indexed_paths, indexed_dirs = scanner.indexed_under(root)
+            removed = [path for path in indexed_paths if path not in seen_paths]
+            self.library_index.remove_files(removed)
+            removed_dirs = [path for path in indexed_dirs if path not in visited_dirs]
+            if root not in visited_dirs:
+                removed_dirs.append(root)
+            self.library_index.remove_dirs(removed_dirs)
+        self.library_index.commit()
+    
+    def _flush_batch(self, generation, scanner, batch, found_files, estimated_total):
+        """
+        Record a batch in the library index and hand it to the GUI thread
+        
+        Runs on the worker thread, so index writes stay off the GUI thread.
+        Directory summaries are stored after their files so an interrupted
+        scan never leaves a summary pointing at unindexed files.
+        """
+        records = [(path, size, mtime) for path, size, mtime, _ in batch]
+        if self.library_index is not None:
+            self.library_index.update_files(
+                [record for record, entry in zip(records, batch) if not entry[3]]
+            )
+            self.library_index.store_dir_summaries(scanner.take_dir_summaries())
+        if records:
+            self._batch_ready.emit(generation, records, found_files, estimated_total)
+    
+    def _on_batch_ready(self, generation, batch, found_files, estimated_total):
+        """Collect a batch from the worker and forward it on the GUI thread"""
+        if generation != self._generation:
+            return
+        
+        # Keep each batch in path order so albums stay together
+        batch.sort()
+        paths = []
+        for path, size, mtime in batch:
+            self.file_stats[path] = (size, mtime)
+            paths.append(path)
+        self.music_files.extend(paths)
+        
+        if ('first_results' not in self.scan_metrics
+                and len(self.music_files) >= self.FIRST_RESULTS_COUNT):
+            self.scan_metrics['first_results'] = time.monotonic() - self._scan_start_time
+        
+        self.scan_batch.emit(paths)
+        self.scan_progress.emit(found_files, estimated_total)
+    
+    def _on_scan_done(self, generation, visited_dirs):
+        """Finish a scan on the GUI thread"""
+        if generation != self._generation:
+            return
+        
+        self._scan_thread = None
+        self._cancel_event = None
+        self._suspend_event = None
+        self._scanner = None
+        
+        self.scan_metrics['total'] = time.monotonic() - self._scan_start_time
+        self.scan_metrics['files'] = len(self.music_files)
+        
+        # Sort files by name
+        self.music_files.sort()
+        self.scan_progress.emit(len(self.music_files), len(self.music_files))
+        self.scan_finished.emit(self.music_files)
+        
+        self._library_dirs = visited_dirs
+        if self.watch_enabled:
+            self._watch_directories(visited_dirs)
+    
+    def _on_scan_failed(self, generation, message):
+        """Report a scan error on the GUI thread"""
+        if generation != self._generation:
+            return
+        
+        self._scan_thread = None
+        self._cancel_event = None
+        self._suspend_event = None
+        self._scanner = None
+        self.error.emit(message)
+    
+    def set_watch_enabled(self, enabled):
+        """
+        Turn live library updates on or off
+        
+        Args:
+            enabled (bool): True to follow the library directories for changes
+        """
+        self.watch_enabled = enabled
+        if not enabled:
+            self.stop_watching()
+        elif self._library_dirs and not self.is_scanning():
+            self._watch_directories(self._library_dirs)
+    
+    def stop_watching(self):
+        """Stop following the library directories and drop queued changes"""
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._debounce_timer.stop()
+        self._poll_timer.stop()
+        self._polled_dirs = {}
+        self._dirty_dirs = set()
+    
+    def _watch_directories(self, directories):
+        """
+        Add directories to the watcher, polling the ones it cannot take
+        
+        Args:
+            directories (list): Directories to follow
+        """
+        watched = set(self._watcher.directories())
+        new_dirs = [d for d in directories if d not in watched and d not in self._polled_dirs]
+        if not new_dirs:
+            return
+        
+        # addPaths returns the paths that could not be watched
+        for directory in self._watcher.addPaths(new_dirs):
+            try:
+                self._polled_dirs[directory] = os.stat(directory).st_mtime
+            except OSError:
+                continue
+        
+        if self._polled_dirs and not self._poll_timer.isActive():
+            self._poll_timer.start(self.poll_interval)
+    
+    def _on_directory_changed(self, directory):
+        """Queue a changed directory and restart the debounce timer"""
+        self._dirty_dirs.add(directory)
+        self._debounce_timer.start(self.watch_debounce)
+    
+    def _poll_directories(self):
+        """Compare polled directories against their recorded mtimes"""
+        changed = False
+        for directory, mtime in list(self._polled_dirs.items()):
+            try:
+                current = os.stat(directory).st_mtime
+            except OSError:
+                # Gone: the refresh drops everything below it
+                del self._polled_dirs[directory]
+                self._dirty_dirs.add(directory)
+                changed = True
+                continue
+            
+            if current != mtime:
+                self._polled_dirs[directory] = current
+                self._dirty_dirs.add(directory)
+                changed = True
+        
+        if changed:
+            self._debounce_timer.start(self.watch_debounce)
+    
+    def _apply_pending_changes(self):
+        """Refresh the queued directories on a worker thread"""
+        if not self._dirty_dirs or self.is_scanning():
+            return
+        
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            # Try again once the running refresh has finished
+            self._debounce_timer.start(self.watch_debounce)
+            return
+        
+        # Nested directories are covered by walking their dirty ancestor
+        dirs = self._collapse_dirs(self._dirty_dirs)
+        self._dirty_dirs = set()
+        
+        prefixes = tuple(os.path.join(d, "") for d in dirs)
+        known = {path: stats for path, stats in self.file_stats.items()
+                 if path.startswith(prefixes)}
+        
+        self._refresh_thread = threading.Thread(
+            target=self._run_refresh,
+            args=(self._create_scanner(), dirs, known, self._generation),
+            daemon=True
+        )
+        self._refresh_thread.start()
+    
+    def _run_refresh(self, scanner, directories, known, generation):
+        """
+        Worker thread body: rescan changed directories and diff against the library
+        
+        Args:
+            scanner (LibraryScanner): Scanner for this refresh
+            directories (list): Changed directories, none nested in another
+            known (dict): path -> (size, mtime) currently in the library below them
+            generation (int): Scan generation used to discard stale results
+        """
+        try:
+            found = {}
+            for path, size, mtime, _ in scanner.walk(directories):
+                found[path] = (size, mtime)
+            
+            updated = [(path, size, mtime) for path, (size, mtime) in found.items()
+                       if known.get(path) != (size, mtime)]
+            removed = [path for path in known if path not in found]
             
-            # Emit scan finished signal
-            self.scan_finished.emit(self.music_files)
+            if self.library_index is not None:
+                self.library_index.update_files(updated)
+                self.library_index.store_dir_summaries(scanner.take_dir_summaries())
+            self._prune_index(directories, found, scanner)
+            
+            self._refresh_done.emit(generation, updated, removed, sorted(scanner.visited_dirs))
+        
+        except Exception as e:
+            self._scan_failed.emit(generation, f"Error updating library: {str(e)}")
+    
+    def _on_refresh_done(self, generation, updated, removed, visited_dirs):
+        """Apply an incremental library update on the GUI thread"""
+        if generation != self._generation:
+            return
+        
+        self._refresh_thread = None
         
+        if removed:
+            removed_set = set(removed)
+            for path in removed:
+                self.file_stats.pop(path, None)
+            self.music_files = [path for path in self.music_files if path not in removed_set]
+        
+        for path, size, mtime in updated:
+            if path not in self.file_stats:
+                bisect.insort(self.music_files, path)
+            self.file_stats[path] = (size, mtime)
+        
+        if self.watch_enabled:
+            self._watch_directories(visited_dirs)
+        
+        if updated or removed:
+            self.library_changed.emit([path for path, _, _ in updated], removed)
+        
+        # Changes that arrived while this refresh was running
+        if self._dirty_dirs:
+            self._debounce_timer.start(self.watch_debounce)
+    
+    def find_duplicates(self):
+        """
+        Look for duplicate rips across the library in the background
+        
+        Groups of files with identical content arrive through
+        duplicates_found. Hashes are cached in the library index, so only
+        files added or changed since the last search are read again.
+        """
+        if self._duplicates_thread is not None and self._duplicates_thread.is_alive():
+            return
+        
+        self._duplicates_thread = threading.Thread(
+            target=self._run_find_duplicates,
+            args=(list(self.music_files), dict(self.file_stats)),
+            daemon=True
+        )
+        self._duplicates_thread.start()
+    
+    def _run_find_duplicates(self, paths, file_stats):
+        """Worker thread body: hash the library and report duplicate groups"""
+        try:
+            finder = DuplicateFinder(self.library_index)
+            self._duplicates_done.emit(finder.find_duplicates(paths, file_stats), "")
         except Exception as e:
-            self.error.emit(f"Error scanning directory: {str(e)}")
+            self._duplicates_done.emit([], f"Error finding duplicates: {str(e)}")
+    
+    def _on_duplicates_done(self, groups, message):
+        """Forward duplicate search results on the GUI thread"""
+        self._duplicates_thread = None
+        if message:
+            self.error.emit(message)
+        else:
+            self.duplicates_found.emit(groups)
     
     def get_files(self):
         """
@@ -72,6 +696,18 @@ class FileManager(QObject):
         """
         return self.music_files
     
+    def get_file_stat(self, file_path):
+        """
+        Get the size and mtime of a library file as of the last scan or update
+        
+        Args:
+            file_path (str): Path to the file
+            
+        Returns:
+            tuple: (size, mtime), or None if the file is not in the library
+        """
+        return self.file_stats.get(file_path)
+    
     def get_file_details(self, file_path):
         """
         Get basic details about a file
@@ -83,15 +719,21 @@ class FileManager(QObject):
             dict: File details including name, size, etc.
         """
         try:
-            if not os.path.exists(file_path):
-                return None
-                
-            stat_info = os.stat(file_path)
+            # Reuse the stat data captured while scanning
+            cached = self.file_stats.get(file_path)
+            if cached is not None:
+                size, mtime = cached
+            else:
+                if not os.path.exists(file_path):
+                    return None
+                stat_info = os.stat(file_path)
+                size, mtime = stat_info.st_size, stat_info.st_mtime
+            
             return {
                 'name': os.path.basename(file_path),
                 'path': file_path,
-                'size': stat_info.st_size,
-                'modified': stat_info.st_mtime
+                'size': size,
+                'modified': mtime
             }
         except Exception as e:
             self.error.emit(f"Error getting file details: {str(e)}")
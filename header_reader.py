@@ -0,0 +1,513 @@
+"""
+Header reader module for extracting approximate metadata with bounded I/O
+"""
+
+import os
+import mmap
+import struct
+
+# MPEG audio header tables, indexed by version (1, 2, 2.5) and layer
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MPEG_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+# ID3v2 text frames (v2.3/v2.4 and v2.2 ids) -> TrackInfo field
+ID3_TEXT_FRAMES = {
+    'TIT2': 'title', 'TT2': 'title',
+    'TPE1': 'artist', 'TP1': 'artist',
+    'TALB': 'album', 'TAL': 'album',
+    'TDRC': 'year', 'TYER': 'year', 'TYE': 'year',
+    'TRCK': 'track', 'TRK': 'track',
+    'TCON': 'genre', 'TCO': 'genre',
+}
+ID3_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+# Vorbis comment names (FLAC, Ogg Vorbis) -> TrackInfo field
+VORBIS_FIELDS = {
+    'TITLE': 'title',
+    'ARTIST': 'artist',
+    'ALBUM': 'album',
+    'DATE': 'year',
+    'TRACKNUMBER': 'track',
+    'GENRE': 'genre',
+}
+
+class _FileWindows:
+    """
+    Maps windows of an open file while keeping count of a read budget
+    
+    Windows are copied out of a short-lived memory map, so only the pages
+    that are asked for get read. Files that cannot be mapped are read
+    with a seek instead.
+    """
+    
+    def __init__(self, f, size, budget):
+        self.f = f
+        self.size = size
+        self.budget = budget
+        self.used = 0
+    
+    def read(self, offset, length):
+        """
+        Get bytes of the file, clipped to the file size and the remaining budget
+        
+        Args:
+            offset (int): Position in the file
+            length (int): Bytes wanted
+        
+        Returns:
+            bytes: The window, possibly shorter than length
+        """
+        offset = max(0, offset)
+        length = min(length, self.size - offset, self.budget - self.used)
+        if length <= 0:
+            return b''
+        self.used += length
+        
+        # Map offsets must be multiples of the allocation granularity
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        try:
+            with mmap.mmap(self.f.fileno(), offset + length - start,
+                           access=mmap.ACCESS_READ, offset=start) as mapped:
+                return mapped[offset - start:]
+        except (ValueError, OSError):
+            self.f.seek(offset)
+            return self.f.read(length)
+
+class HeaderReader:
+    """
+    Reads approximate metadata from the tag region and stream headers only
+    
+    A full parse reads every tag frame, including embedded cover art, and
+    may walk the audio stream. This reader looks at no more than BUDGET
+    bytes per file, which keeps a first import of a large library light on
+    slow disks and network mounts:
+    
+    - MP3: ID3v2 text frames, then the first frame header; the duration
+      comes from a Xing/Info or VBRI header, or from the bitrate for CBR
+    - FLAC: the STREAMINFO and VORBIS_COMMENT blocks; other blocks, such
+      as pictures, are skipped over
+    - Ogg Vorbis: the identification and comment headers, and the granule
+      position of the last page for the duration
+    
+    MP3 text frames past the budget are skipped, and nothing is read for
+    the cover, so results may be less complete than a full parse. FLAC and
+    Ogg files whose comments do not fit in the budget are left to the full
+    parser.
+    """
+    
+    # Bytes read per file at most
+    BUDGET = 128 * 1024
+    
+    # Bytes read at the first MP3 frame when it lies past the tag window
+    FRAME_WINDOW = 4 * 1024
+    
+    # Bytes read at the end of an Ogg file to find the last page
+    OGG_TAIL = 16 * 1024
+    
+    def __init__(self, budget=None):
+        """
+        Initialize the header reader
+        
+        Args:
+            budget (int): Bytes read per file at most, defaults to BUDGET
+        """
+        self.budget = budget or self.BUDGET
+        
+        # Bytes read by all calls, for measuring
+        self.bytes_read = 0
+    
+    def read(self, file_path):
+        """
+        Read approximate metadata of a file
+        
+        Args:
+            file_path (str): Path to the audio file
+        
+        Returns:
+            dict: TrackInfo fields that were found, or None if the format is
+                not supported or the headers cannot be understood
+        """
+        readers = {
+            '.mp3': self._read_mp3,
+            '.flac': self._read_flac,
+            '.ogg': self._read_ogg,
+        }
+        reader = readers.get(os.path.splitext(file_path.lower())[1])
+        if reader is None:
+            return None
+        
+        try:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return None
+                windows = _FileWindows(f, size, self.budget)
+                try:
+                    fields = reader(windows)
+                finally:
+                    self.bytes_read += windows.used
+        except (OSError, ValueError, IndexError, struct.error):
+            return None
+        
+        if fields is not None:
+            fields['file_size'] = size // 1024  # KB
+        return fields
+    
+    @staticmethod
+    def _id3_size(head):
+        """Total size of the ID3v2 tag at the start of head, 0 if there is none"""
+        if len(head) < 10 or head[:3] != b'ID3':
+            return 0
+        size = ((head[6] & 0x7f) << 21 | (head[7] & 0x7f) << 14 |
+                (head[8] & 0x7f) << 7 | (head[9] & 0x7f))
+        footer = 10 if head[5] & 0x10 else 0
+        return 10 + size + footer
+    
+    def _read_mp3(self, windows):
+        """Read ID3v2 text frames and the first MPEG frame"""
+        head = windows.read(0, self.FRAME_WINDOW)
+        tag_size = self._id3_size(head)
+        fields = {}
+        if tag_size:
+            # The rest of the tag and the first frame, as far as the budget allows
+            wanted = min(tag_size + self.FRAME_WINDOW, self.budget - self.FRAME_WINDOW)
+            head += windows.read(len(head), wanted - len(head))
+            fields = self._read_id3_frames(head, tag_size)
+        
+        # The first frame, plus room for a Xing or VBRI header behind it
+        if tag_size + self.FRAME_WINDOW <= len(head) or len(head) == windows.size:
+            data = head[tag_size:]
+        else:
+            data = windows.read(tag_size, self.FRAME_WINDOW)
+        
+        found = self._find_mpeg_frame(data)
+        if found is None:
+            return None
+        position, frame = found
+        version, layer, bitrate, sample_rate, mode = frame
+        samples = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+        
+        # VBR files describe the stream in their first frame
+        frames = stream_bytes = None
+        side_info = (32 if mode != 3 else 17) if version == 1 else (17 if mode != 3 else 9)
+        xing = position + 4 + side_info
+        vbri = position + 36
+        if data[xing:xing + 4] in (b'Xing', b'Info'):
+            flags, = struct.unpack('>I', data[xing + 4:xing + 8])
+            offset = xing + 8
+            if flags & 1:
+                frames, = struct.unpack('>I', data[offset:offset + 4])
+                offset += 4
+            if flags & 2:
+                stream_bytes, = struct.unpack('>I', data[offset:offset + 4])
+        elif data[vbri:vbri + 4] == b'VBRI':
+            stream_bytes, frames = struct.unpack('>II', data[vbri + 10:vbri + 18])
+        
+        if frames:
+            duration = frames * samples / sample_rate
+            if stream_bytes and duration > 0:
+                bitrate = int(stream_bytes * 8 / duration / 1000)
+        else:
+            # CBR: the rest of the file at the header bitrate
+            audio_bytes = windows.size - tag_size - position
+            duration = audio_bytes * 8 / (bitrate * 1000)
+        
+        fields.update({
+            'duration': int(duration),
+            'bitrate': bitrate,
+            'sample_rate': sample_rate,
+            'channels': 2 if mode != 3 else 1,
+            'layer': layer,
+            'version': float(version),
+        })
+        return fields
+    
+    @staticmethod
+    def _parse_mpeg_header(data, position):
+        """
+        Decode the MPEG audio frame header at position
+        
+        Returns:
+            tuple: (version, layer, bitrate in kbps, sample rate, channel mode,
+                frame length), or None if there is no valid header
+        """
+        b1, b2, b3 = data[position + 1], data[position + 2], data[position + 3]
+        if data[position] != 0xff or b1 & 0xe0 != 0xe0:
+            return None
+        version = {0: 2.5, 2: 2, 3: 1}.get((b1 >> 3) & 3)
+        layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 3)
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 3
+        if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+            return None
+        
+        bitrate = MPEG_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+        sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 1
+        if layer == 1:
+            length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+        elif layer == 3 and version != 1:
+            length = 72 * bitrate * 1000 // sample_rate + padding
+        else:
+            length = 144 * bitrate * 1000 // sample_rate + padding
+        return version, layer, bitrate, sample_rate, b3 >> 6, length
+    
+    def _find_mpeg_frame(self, data):
+        """
+        Find the first MPEG audio frame, confirmed by the header of the next one
+        
+        Returns:
+            tuple: (position, (version, layer, bitrate, sample rate, mode)),
+                or None if no frame was found
+        """
+        position = data.find(b'\xff')
+        while 0 <= position <= len(data) - 4:
+            header = self._parse_mpeg_header(data, position)
+            if header is not None:
+                following = position + header[5]
+                if following > len(data) - 4:
+                    return position, header[:5]
+                next_header = self._parse_mpeg_header(data, following)
+                if next_header is not None and next_header[:2] == header[:2]:
+                    return position, header[:5]
+            position = data.find(b'\xff', position + 1)
+        return None
+    
+    @staticmethod
+    def _read_id3_frames(head, tag_size):
+        """
+        Decode the ID3v2 text frames that lie inside head
+        
+        Returns:
+            dict: TrackInfo field -> text
+        """
+        major, flags = head[3], head[5]
+        end = min(tag_size, len(head))
+        data = head[:end]
+        if major < 4 and flags & 0x80:
+            # Whole-tag unsynchronisation (v2.2/v2.3)
+            data = data[:10] + data[10:].replace(b'\xff\x00', b'\xff')
+            end = len(data)
+        
+        position = 10
+        if flags & 0x40 and major >= 3:
+            # Extended header: v2.3 size excludes its own field, v2.4 includes it
+            if major == 3:
+                position += 4 + struct.unpack('>I', data[10:14])[0]
+            else:
+                position += ((data[10] & 0x7f) << 21 | (data[11] & 0x7f) << 14 |
+                             (data[12] & 0x7f) << 7 | (data[13] & 0x7f))
+        
+        id_length, header_length = (3, 6) if major == 2 else (4, 10)
+        fields = {}
+        while position + header_length <= end:
+            frame_id = data[position:position + id_length]
+            if not frame_id.isalnum():
+                break  # padding
+            if major == 2:
+                frame_size = int.from_bytes(data[position + 3:position + 6], 'big')
+                frame_flags = 0
+            elif major == 3:
+                frame_size = int.from_bytes(data[position + 4:position + 8], 'big')
+                # Compression and encryption flags, as v2.4 bits
+                frame_flags = 0x0c if data[position + 9] & 0xc0 else 0
+            else:
+                size_bytes = data[position + 4:position + 8]
+                frame_size = ((size_bytes[0] & 0x7f) << 21 | (size_bytes[1] & 0x7f) << 14 |
+                              (size_bytes[2] & 0x7f) << 7 | (size_bytes[3] & 0x7f))
+                frame_flags = data[position + 9]
+            body_start = position + header_length
+            position = body_start + frame_size
+            if position > end:
+                break  # runs past the tag window
+            
+            field = ID3_TEXT_FRAMES.get(frame_id.decode('latin-1'))
+            if field is None or frame_size < 2 or frame_flags & 0x0c:
+                continue  # not wanted, compressed or encrypted
+            body = data[body_start:position]
+            if frame_flags & 0x02:
+                body = body.replace(b'\xff\x00', b'\xff')
+            if frame_flags & 0x01:
+                body = body[4:]  # data length indicator
+            if not body or body[0] >= len(ID3_ENCODINGS):
+                continue
+            
+            text = body[1:].decode(ID3_ENCODINGS[body[0]], 'replace')
+            values = [value.lstrip('\ufeff') for value in text.split('\x00')]
+            text = "/".join(value for value in values if value)
+            if text:
+                fields[field] = text
+        return fields
+    
+    @staticmethod
+    def _vorbis_comments(data):
+        """
+        Get the wanted fields of a Vorbis comment block: a vendor string,
+        then NAME=value entries; the first value of a name wins
+        
+        Args:
+            data (bytes): The comment block, without any packet type prefix
+        
+        Returns:
+            dict: TrackInfo fields that were found
+        """
+        fields = {}
+        try:
+            vendor_length, = struct.unpack_from('<I', data, 0)
+            position = 4 + vendor_length
+            count, = struct.unpack_from('<I', data, position)
+            position += 4
+            for _ in range(count):
+                length, = struct.unpack_from('<I', data, position)
+                entry = data[position + 4:position + 4 + length]
+                position += 4 + length
+                name, separator, value = entry.partition(b'=')
+                field = VORBIS_FIELDS.get(name.decode('ascii', 'replace').upper())
+                if field and separator and field not in fields:
+                    text = value.decode('utf-8', 'replace')
+                    if text:
+                        fields[field] = text
+        except struct.error:
+            pass  # truncated block, keep what was read
+        return fields
+    
+    def _read_ogg_packet(self, windows, position):
+        """
+        Read the packet that starts at the Ogg page at position
+        
+        Returns:
+            bytes: The packet, or None if it runs past the budget or the
+                pages cannot be understood
+        """
+        packet = bytearray()
+        while True:
+            header = windows.read(position, 27)
+            if len(header) < 27 or header[:4] != b'OggS':
+                return None
+            segments = header[26]
+            table = windows.read(position + 27, segments)
+            if len(table) < segments:
+                return None
+            
+            # Lacing values of 255 continue the packet; anything less ends it
+            length = 0
+            complete = False
+            for lacing in table:
+                length += lacing
+                if lacing < 255:
+                    complete = True
+                    break
+            data = windows.read(position + 27 + segments, length)
+            if len(data) < length:
+                return None
+            packet += data
+            if complete:
+                return bytes(packet)
+            position += 27 + segments + sum(table)
+    
+    def _read_flac(self, windows):
+        """Read the FLAC STREAMINFO and VORBIS_COMMENT blocks"""
+        head = windows.read(0, self.FRAME_WINDOW)
+        position = self._id3_size(head)
+        if position + 42 <= len(head):
+            block = head[position:position + 42]
+        else:
+            block = windows.read(position, 42)
+        
+        # "fLaC", then STREAMINFO must be the first metadata block
+        if block[:4] != b'fLaC' or block[4] & 0x7f != 0 or len(block) < 42:
+            return None
+        info = block[8:42]
+        sample_rate = info[10] << 12 | info[11] << 4 | info[12] >> 4
+        channels = ((info[12] >> 1) & 7) + 1
+        total_samples = (info[13] & 0x0f) << 32 | struct.unpack('>I', info[14:18])[0]
+        if not sample_rate:
+            return None
+        
+        # Walk the metadata block headers to the Vorbis comments, if any
+        comments = {}
+        last = block[4] & 0x80
+        block_start = position + 42
+        while not last:
+            header = windows.read(block_start, 4)
+            if len(header) < 4:
+                return None
+            last = header[0] & 0x80
+            length = int.from_bytes(header[1:4], 'big')
+            if header[0] & 0x7f == 4:
+                data = windows.read(block_start + 4, length)
+                if len(data) < length:
+                    return None  # past the budget
+                comments = self._vorbis_comments(data)
+                break
+            block_start += 4 + length
+        
+        duration = total_samples / sample_rate
+        fields = {
+            'duration': int(duration),
+            'sample_rate': sample_rate,
+            'channels': channels,
+        }
+        if duration > 0:
+            fields['bitrate'] = int(windows.size * 8 / duration / 1000)
+        fields.update(comments)
+        return fields
+    
+    def _read_ogg(self, windows):
+        """
+        Read the Vorbis identification and comment headers and the last
+        page's granule position
+        """
+        head = windows.read(0, self.FRAME_WINDOW)
+        if len(head) < 28 or head[:4] != b'OggS':
+            return None
+        serial = head[14:18]
+        segments = head[26]
+        packet_start = 27 + segments
+        packet = head[packet_start:packet_start + 30]
+        if len(packet) < 30 or packet[:7] != b'\x01vorbis':
+            return None
+        channels = packet[11]
+        sample_rate, _, nominal_bitrate = struct.unpack('<Iii', packet[12:24])
+        if not sample_rate:
+            return None
+        
+        # The comment header starts on the second page
+        second_page = packet_start + sum(head[27:27 + segments])
+        comment_packet = self._read_ogg_packet(windows, second_page)
+        if comment_packet is None or comment_packet[:7] != b'\x03vorbis':
+            return None
+        
+        # The granule position of the last page counts the samples
+        duration = None
+        tail_start = max(0, windows.size - self.OGG_TAIL)
+        tail = windows.read(tail_start, self.OGG_TAIL)
+        position = tail.rfind(b'OggS')
+        while position >= 0:
+            if len(tail) - position >= 27 and tail[position + 14:position + 18] == serial:
+                granule, = struct.unpack('<q', tail[position + 6:position + 14])
+                if granule > 0:
+                    duration = granule / sample_rate
+                    break
+            position = tail.rfind(b'OggS', 0, position)
+        
+        if duration is None and nominal_bitrate > 0:
+            duration = windows.size * 8 / nominal_bitrate
+        fields = {
+            'duration': int(duration or 0),
+            'sample_rate': sample_rate,
+            'channels': channels,
+        }
+        if nominal_bitrate > 0:
+            fields['bitrate'] = nominal_bitrate // 1000
+        elif duration:
+            fields['bitrate'] = int(windows.size * 8 / duration / 1000)
+        fields.update(self._vorbis_comments(comment_packet[7:]))
+        return fields
@@ -139,7 +139,9 @@ def copy_files(install_dir):
     # These are the files and directories that need to be copied
     required_items = [
         "main.py", "player.py", "file_manager.py", "metadata.py", 
-        "playlist.py", "visualizer.py", "themes.py", "loading_screen.py", "ui"
+        "playlist.py", "visualizer.py", "themes.py", "loading_screen.py", "ui",
+        "library_index.py", "scanner.py", "duplicates.py", "utils", "thumbnail_cache.py",
+        "header_reader.py", "library_store.py", "search_index.py", "playlist_formats.py"
     ]
     
     try:
@@ -0,0 +1,475 @@
+"""
+Library index module for persisting scanned tracks between sessions
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from PyQt5.QtCore import QDir
+
+def default_index_path():
+    """
+    Get the default location of the library index database
+    
+    Returns:
+        str: Path to library.db next to config.ini
+    """
+    return os.path.join(QDir.homePath(), ".retromp3player", "library.db")
+
+class LibraryIndex:
+    """
+    Persistent on-disk index of library files backed by SQLite
+    
+    Each track is keyed by its path and stores the size and mtime seen at
+    the last scan together with the extracted metadata. Metadata is only
+    trusted while the size and mtime still match, so a rescan just has to
+    stat files and re-parse the ones that changed.
+    
+    The index is shared between the GUI thread and the scan worker, so all
+    access goes through a single lock-protected connection.
+    """
+    
+    # Number of writes collected before an automatic commit
+    COMMIT_INTERVAL = 1000
+    
+    def __init__(self, db_path=None):
+        """
+        Open (and create if needed) the library index
+        
+        Args:
+            db_path (str): Database file, defaults to ~/.retromp3player/library.db
+        """
+        self.db_path = db_path or default_index_path()
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Create tables and tune the connection for bulk updates"""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                "path TEXT PRIMARY KEY, "
+                "directory TEXT, "
+                "size INTEGER NOT NULL, "
+                "mtime REAL NOT NULL, "
+                "metadata TEXT, "
+                "partial_hash TEXT, "
+                "content_hash TEXT)"
+            )
+            
+            # Indexes created by older versions lack the newer columns
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tracks)")]
+            for column in ("directory", "partial_hash", "content_hash"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE tracks ADD COLUMN {column} TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS tracks_directory ON tracks (directory)"
+            )
+            
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS directories ("
+                "path TEXT PRIMARY KEY, "
+                "mtime REAL NOT NULL, "
+                "child_count INTEGER NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "subdirs TEXT NOT NULL, "
+                "rules TEXT NOT NULL DEFAULT '')"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(directories)")]
+            if "rules" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE directories ADD COLUMN rules TEXT NOT NULL DEFAULT ''"
+                )
+            
+            # Checkpoint of an interrupted scan
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_state (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_frontier ("
+                "path TEXT PRIMARY KEY, mtime REAL NOT NULL, depth INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_completed (path TEXT PRIMARY KEY)"
+            )
+            self._conn.commit()
+    
+    def _wrote(self, count=1):
+        """Record pending writes and commit once enough have accumulated"""
+        self._pending_writes += count
+        if self._pending_writes >= self.COMMIT_INTERVAL:
+            self._conn.commit()
+            self._pending_writes = 0
+    
+    def commit(self):
+        """Flush pending writes to disk"""
+        with self._lock:
+            self._conn.commit()
+            self._pending_writes = 0
+    
+    def close(self):
+        """Commit pending writes and close the database"""
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+    
+    def update_files(self, records):
+        """
+        Record the stat data of scanned files
+        
+        Files whose size or mtime changed lose their stored metadata and
+        hashes so they get computed again on the next lookup.
+        
+        Args:
+            records (list): (path, size, mtime) tuples
+        """
+        rows = [(path, os.path.dirname(path), size, mtime) for path, size, mtime in records]
+        unchanged = "tracks.size = excluded.size AND tracks.mtime = excluded.mtime"
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tracks (path, directory, size, mtime) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                f"metadata = CASE WHEN {unchanged} THEN tracks.metadata ELSE NULL END, "
+                f"partial_hash = CASE WHEN {unchanged} THEN tracks.partial_hash ELSE NULL END, "
+                f"content_hash = CASE WHEN {unchanged} THEN tracks.content_hash ELSE NULL END, "
+                "directory = excluded.directory, size = excluded.size, mtime = excluded.mtime",
+                rows
+            )
+            self._wrote(len(rows))
+    
+    def get_metadata(self, path, size, mtime):
+        """
+        Get stored metadata if the file has not changed since it was parsed
+        
+        Args:
+            path (str): Path to the file
+            size (int): Current file size
+            mtime (float): Current modification time
+        
+        Returns:
+            dict: Stored metadata, or None if missing or stale
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, metadata FROM tracks WHERE path = ?", (path,)
+            ).fetchone()
+        
+        if row is None or row[2] is None:
+            return None
+        if row[0] != size or row[1] != mtime:
+            return None
+        
+        try:
+            return json.loads(row[2])
+        except ValueError:
+            return None
+    
+    def store_metadata(self, path, size, mtime, metadata):
+        """
+        Store extracted metadata for a file
+        
+        Args:
+            path (str): Path to the file
+            size (int): File size at extraction time
+            mtime (float): Modification time at extraction time
+            metadata (dict): Extracted metadata
+        """
+        unchanged = "tracks.size = excluded.size AND tracks.mtime = excluded.mtime"
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO tracks (path, directory, size, mtime, metadata) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                f"partial_hash = CASE WHEN {unchanged} THEN tracks.partial_hash ELSE NULL END, "
+                f"content_hash = CASE WHEN {unchanged} THEN tracks.content_hash ELSE NULL END, "
+                "directory = excluded.directory, size = excluded.size, "
+                "mtime = excluded.mtime, metadata = excluded.metadata",
+                (path, os.path.dirname(path), size, mtime, json.dumps(metadata))
+            )
+            self._wrote()
+    
+    def get_hashes(self, paths):
+        """
+        Get the content hashes recorded for files
+        
+        Args:
+            paths (list): Paths to look up
+        
+        Returns:
+            dict: path -> (size, mtime, partial_hash, content_hash) for indexed
+                paths; the hashes are only valid while size and mtime match
+        """
+        hashes = {}
+        with self._lock:
+            for path in paths:
+                row = self._conn.execute(
+                    "SELECT size, mtime, partial_hash, content_hash FROM tracks WHERE path = ?",
+                    (path,)
+                ).fetchone()
+                if row is not None:
+                    hashes[path] = row
+        return hashes
+    
+    def store_hashes(self, records):
+        """
+        Record content hashes computed by the duplicate finder
+        
+        Hashes are only stored while the indexed size and mtime still
+        match the ones they were computed for. A missing hash keeps the
+        one already stored.
+        
+        Args:
+            records (list): (path, size, mtime, partial_hash, content_hash) tuples
+        """
+        rows = [(partial, content, path, size, mtime)
+                for path, size, mtime, partial, content in records]
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE tracks SET partial_hash = COALESCE(?, partial_hash), "
+                "content_hash = COALESCE(?, content_hash) "
+                "WHERE path = ? AND size = ? AND mtime = ?",
+                rows
+            )
+            self._conn.commit()
+            self._pending_writes = 0
+    
+    def get_files_in_dir(self, directory):
+        """
+        Get the indexed files directly inside a directory
+        
+        Args:
+            directory (str): Directory path
+        
+        Returns:
+            list: (path, size, mtime) tuples
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size, mtime FROM tracks WHERE directory = ?", (directory,)
+            ).fetchall()
+    
+    def get_dir_summary(self, directory):
+        """
+        Get the summary recorded for a directory at the last scan
+        
+        Args:
+            directory (str): Directory path
+        
+        Returns:
+            tuple: (mtime, child_count, digest, subdirs, rules), or None if
+                unknown; rules is the fingerprint of the scan rules the
+                listing was filtered by
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime, child_count, digest, subdirs, rules FROM directories "
+                "WHERE path = ?",
+                (directory,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        return row[0], row[1], row[2], json.loads(row[3]), row[4]
+    
+    def get_dir_summaries_under(self, directory):
+        """
+        Get the summaries of a directory and every directory below it in one query
+        
+        Args:
+            directory (str): Root directory
+        
+        Returns:
+            dict: Directory path -> summary as returned by get_dir_summary()
+        """
+        prefix = os.path.join(directory, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime, child_count, digest, subdirs, rules FROM directories "
+                "WHERE path = ? OR (path >= ? AND path < ?)",
+                (directory, prefix, upper)
+            ).fetchall()
+        return {row[0]: (row[1], row[2], row[3], json.loads(row[4]), row[5]) for row in rows}
+    
+    def store_dir_summaries(self, summaries):
+        """
+        Record directory summaries
+        
+        Args:
+            summaries (list): (path, mtime, child_count, digest, subdirs_json,
+                rules) tuples
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO directories "
+                "(path, mtime, child_count, digest, subdirs, rules) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                summaries
+            )
+            self._wrote(len(summaries))
+    
+    def get_dirs_under(self, directory):
+        """
+        Get all summarized directories inside a directory tree
+        
+        Args:
+            directory (str): Root directory
+        
+        Returns:
+            list: Directory paths below the root
+        """
+        return self._paths_under("directories", directory)
+    
+    def remove_dirs(self, paths):
+        """
+        Drop directory summaries
+        
+        Args:
+            paths (list): Directories that no longer exist
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM directories WHERE path = ?", [(p,) for p in paths])
+            self._wrote(len(paths))
+    
+    def _paths_under(self, table, directory):
+        """Range query on a table's path key for everything below a directory"""
+        prefix = os.path.join(directory, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT path FROM {table} WHERE path >= ? AND path < ?",
+                (prefix, upper)
+            ).fetchall()
+        return [row[0] for row in rows]
+    
+    def get_files_under(self, directory):
+        """
+        Get all indexed files inside a directory tree with their stat data
+        
+        Args:
+            directory (str): Root directory
+        
+        Returns:
+            list: (path, size, mtime) tuples
+        """
+        prefix = os.path.join(directory, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size, mtime FROM tracks WHERE path >= ? AND path < ?",
+                (prefix, upper)
+            ).fetchall()
+    
+    def get_dir_files_under(self, directory):
+        """
+        Get the indexed files of a directory tree grouped by directory
+        
+        Args:
+            directory (str): Root directory
+        
+        Returns:
+            dict: Directory path -> list of (path, size, mtime) tuples
+        """
+        prefix = os.path.join(directory, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT directory, path, size, mtime FROM tracks WHERE path >= ? AND path < ?",
+                (prefix, upper)
+            ).fetchall()
+        files = {}
+        for row in rows:
+            listing = files.get(row[0])
+            if listing is None:
+                listing = files[row[0]] = []
+            listing.append(row[1:])
+        return files
+    
+    def save_checkpoint(self, roots, pending, completed):
+        """
+        Persist the progress of a running scan
+        
+        The frontier is replaced on every call while completed directories
+        are only appended, so each checkpoint writes little more than the
+        current frontier.
+        
+        Args:
+            roots (list): Library roots being scanned
+            pending (list): (path, mtime, depth) tuples still to be read
+            completed (list): Directories completed since the last checkpoint
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scan_state (key, value) VALUES ('roots', ?)",
+                (json.dumps(roots),)
+            )
+            self._conn.execute("DELETE FROM scan_frontier")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scan_frontier (path, mtime, depth) VALUES (?, ?, ?)",
+                pending
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scan_completed (path) VALUES (?)",
+                [(path,) for path in completed]
+            )
+            self._conn.commit()
+            self._pending_writes = 0
+    
+    def load_checkpoint(self):
+        """
+        Get the checkpoint of an interrupted scan
+        
+        Returns:
+            tuple: (roots, pending, completed), or None if there is none
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM scan_state WHERE key = 'roots'"
+            ).fetchone()
+            if row is None:
+                return None
+            pending = self._conn.execute(
+                "SELECT path, mtime, depth FROM scan_frontier"
+            ).fetchall()
+            completed = [r[0] for r in self._conn.execute("SELECT path FROM scan_completed")]
+        return json.loads(row[0]), pending, completed
+    
+    def clear_checkpoint(self):
+        """Forget the checkpoint once a scan has finished or was replaced"""
+        with self._lock:
+            self._conn.execute("DELETE FROM scan_state")
+            self._conn.execute("DELETE FROM scan_frontier")
+            self._conn.execute("DELETE FROM scan_completed")
+            self._conn.commit()
+            self._pending_writes = 0
+    
+    def get_paths_under(self, directory):
+        """
+        Get all indexed paths inside a directory tree
+        
+        Args:
+            directory (str): Root directory
+        
+        Returns:
+            list: Indexed file paths below the directory
+        """
+        return self._paths_under("tracks", directory)
+    
+    def remove_files(self, paths):
+        """
+        Drop files from the index
+        
+        Args:
+            paths (list): Paths that no longer exist
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM tracks WHERE path = ?", [(p,) for p in paths])
+            self._wrote(len(paths))
@@ -0,0 +1,338 @@
+"""
+Library store module for sorting and aggregating the library column by column
+"""
+
+import numpy as np
+
+class _Dictionary:
+    """
+    Dictionary encoding of one categorical column
+    
+    Each distinct value gets an integer code in order of first appearance,
+    so the column itself is a compact integer array.
+    """
+    
+    def __init__(self):
+        self.values = [""]
+        self.codes = {"": 0}
+        self._ranks = None
+    
+    def encode(self, value):
+        """Get the code of a value, adding it if it is new"""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self._ranks = None
+        return code
+    
+    def ranks(self):
+        """
+        Get the sort position of every code
+        
+        Returns:
+            numpy.ndarray: Rank of each code, in case-insensitive value order
+        """
+        if self._ranks is None:
+            order = sorted(range(len(self.values)), key=lambda code: self.values[code].lower())
+            self._ranks = np.empty(len(self.values), dtype=np.int32)
+            self._ranks[order] = np.arange(len(self.values), dtype=np.int32)
+        return self._ranks
+
+class LibraryStore:
+    """
+    In-memory columnar copy of the library for vectorized sorts and aggregates
+    
+    Numeric fields are kept in NumPy arrays, one per column, and artist,
+    album and genre are dictionary-encoded into integer codes. Sorting,
+    filtering and summing then run as array operations instead of a Python
+    loop over one record per track. Row order is arbitrary; removing a
+    track moves the last row into its place.
+    
+    Used from the GUI thread only.
+    """
+    
+    # Numeric columns and their types; missing values are stored as 0
+    NUMERIC_COLUMNS = {
+        'duration': np.int32,     # seconds
+        'bitrate': np.int32,      # kbps
+        'sample_rate': np.int32,  # Hz
+        'year': np.int16,
+        'rating': np.int8,
+        'size': np.int64,         # KB
+    }
+    
+    # Dictionary-encoded columns
+    CATEGORICAL_COLUMNS = ('artist', 'album', 'genre')
+    
+    def __init__(self, capacity=1024):
+        """
+        Create an empty store
+        
+        Args:
+            capacity (int): Rows allocated up front; the arrays grow as needed
+        """
+        self._capacity = capacity
+        self.clear()
+    
+    def __len__(self):
+        return self._count
+    
+    def __contains__(self, file_path):
+        return file_path in self._rows
+    
+    def clear(self):
+        """Remove every track"""
+        self._count = 0
+        self._paths = np.empty(self._capacity, dtype=object)
+        self._rows = {}  # path -> row
+        self._columns = {name: np.zeros(self._capacity, dtype=dtype)
+                         for name, dtype in self.NUMERIC_COLUMNS.items()}
+        self._dictionaries = {name: _Dictionary() for name in self.CATEGORICAL_COLUMNS}
+        for name in self.CATEGORICAL_COLUMNS:
+            self._columns[name] = np.zeros(self._capacity, dtype=np.int32)
+    
+    def _grow(self, count):
+        """Make room for count rows"""
+        capacity = len(self._columns['duration'])
+        if count <= capacity:
+            return
+        while capacity < count:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._count] = column[:self._count]
+            self._columns[name] = grown
+        paths = np.empty(capacity, dtype=object)
+        paths[:self._count] = self._paths[:self._count]
+        self._paths = paths
+    
+    @staticmethod
+    def _parse_year(year):
+        """Get the year of a tag value like "1997" or "1997-05-12", 0 if unknown"""
+        year = (year or "")[:4]
+        return int(year) if year.isdigit() else 0
+    
+    def update(self, tracks, ratings=None):
+        """
+        Add tracks or replace their values
+        
+        Args:
+            tracks (list): (path, TrackInfo) pairs
+            ratings (dict): Optional path -> rating, for tracks being added
+        """
+        ratings = ratings or {}
+        rows = []
+        values = {name: [] for name in self._columns}
+        new_ratings = []
+        self._grow(self._count + len(tracks))
+        
+        for file_path, metadata in tracks:
+            row = self._rows.get(file_path)
+            if row is None:
+                row = self._rows[file_path] = self._count
+                self._paths[row] = file_path
+                self._count += 1
+                new_ratings.append((row, int(ratings.get(file_path, 0))))
+            rows.append(row)
+            values['duration'].append(metadata.duration or 0)
+            values['bitrate'].append(metadata.bitrate or 0)
+            values['sample_rate'].append(metadata.sample_rate or 0)
+            values['year'].append(self._parse_year(metadata.year))
+            values['size'].append(metadata.file_size or 0)
+            for name in self.CATEGORICAL_COLUMNS:
+                values[name].append(self._dictionaries[name].encode(getattr(metadata, name) or ""))
+        
+        rows = np.array(rows, dtype=np.int64)
+        for name, column_values in values.items():
+            if column_values:
+                self._columns[name][rows] = column_values
+        for row, rating in new_ratings:
+            self._columns['rating'][row] = rating
+    
+    def set_ratings(self, ratings):
+        """
+        Set the rating of tracks
+        
+        Args:
+            ratings (dict): path -> rating; unknown paths are ignored
+        """
+        for file_path, rating in ratings.items():
+            row = self._rows.get(file_path)
+            if row is not None:
+                self._columns['rating'][row] = int(rating)
+    
+    def remove(self, file_paths):
+        """
+        Remove tracks
+        
+        Args:
+            file_paths (list): Paths to remove; unknown paths are ignored
+        """
+        for file_path in file_paths:
+            row = self._rows.pop(file_path, None)
+            if row is None:
+                continue
+            last = self._count - 1
+            if row != last:
+                # Fill the hole with the last row
+                moved = self._paths[last]
+                self._paths[row] = moved
+                self._rows[moved] = row
+                for column in self._columns.values():
+                    column[row] = column[last]
+            self._paths[last] = None
+            self._count = last
+    
+    def column(self, name):
+        """
+        Get a column as an array in row order
+        
+        Args:
+            name (str): Key of NUMERIC_COLUMNS or CATEGORICAL_COLUMNS
+        
+        Returns:
+            numpy.ndarray: The values, codes for categorical columns
+        """
+        return self._columns[name][:self._count]
+    
+    def where(self, name, value):
+        """
+        Select the tracks whose categorical column equals a value
+        
+        Args:
+            name (str): Key of CATEGORICAL_COLUMNS
+            value (str): Value to match
+        
+        Returns:
+            numpy.ndarray: Boolean mask in row order
+        """
+        code = self._dictionaries[name].codes.get(value)
+        if code is None:
+            return np.zeros(self._count, dtype=bool)
+        return self.column(name) == code
+    
+    def between(self, name, low=None, high=None):
+        """
+        Select the tracks whose numeric column is within a range
+        
+        Args:
+            name (str): Key of NUMERIC_COLUMNS
+            low: Smallest value included, None for no lower bound
+            high: Largest value included, None for no upper bound
+        
+        Returns:
+            numpy.ndarray: Boolean mask in row order
+        """
+        values = self.column(name)
+        mask = np.ones(self._count, dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+    
+    def sort(self, keys, descending=False, mask=None):
+        """
+        Get track paths sorted by one or more columns
+        
+        Args:
+            keys (list): Column names, most significant first; categorical
+                columns sort by value, case-insensitively
+            descending (bool): Reverse the order
+            mask (numpy.ndarray): Optional boolean mask of tracks to include
+        
+        Returns:
+            list: Paths in sort order; ties keep their row order
+        """
+        return self.paths(self.order(keys, descending, mask))
+    
+    def order(self, keys, descending=False, mask=None):
+        """
+        Get row numbers sorted by one or more columns, see sort()
+        
+        Returns:
+            numpy.ndarray: Row numbers in sort order
+        """
+        sort_keys = []
+        for name in reversed(keys):
+            values = self.column(name)
+            if name in self._dictionaries:
+                values = self._dictionaries[name].ranks()[values]
+            sort_keys.append(-values.astype(np.int64) if descending else values)
+        
+        rows = np.arange(self._count)
+        if mask is not None:
+            rows = rows[mask]
+            sort_keys = [values[mask] for values in sort_keys]
+        if sort_keys:
+            rows = rows[np.lexsort(sort_keys)]
+        return rows
+    
+    def paths(self, rows=None):
+        """
+        Get the paths of rows
+        
+        Args:
+            rows: Row numbers or a boolean mask, None for all tracks
+        
+        Returns:
+            list: Paths in the given row order
+        """
+        paths = self._paths[:self._count]
+        if rows is None:
+            return paths.tolist()
+        return paths[rows].tolist()
+    
+    def total(self, name, mask=None):
+        """
+        Sum a numeric column, e.g. the total duration
+        
+        Args:
+            name (str): Key of NUMERIC_COLUMNS
+            mask (numpy.ndarray): Optional boolean mask of tracks to include
+        
+        Returns:
+            int: The sum
+        """
+        values = self.column(name)
+        if mask is not None:
+            values = values[mask]
+        return int(values.sum(dtype=np.int64))
+    
+    def count_by(self, name, mask=None):
+        """
+        Count tracks per value of a categorical column, e.g. tracks per genre
+        
+        Args:
+            name (str): Key of CATEGORICAL_COLUMNS
+            mask (numpy.ndarray): Optional boolean mask of tracks to include
+        
+        Returns:
+            dict: Value -> number of tracks, most common first
+        """
+        codes = self.column(name)
+        if mask is not None:
+            codes = codes[mask]
+        values = self._dictionaries[name].values
+        counts = np.bincount(codes, minlength=len(values))
+        order = np.argsort(-counts, kind='stable')
+        return {values[code]: int(counts[code]) for code in order.tolist() if counts[code]}
+    
+    def histogram(self, name, bins, mask=None):
+        """
+        Count tracks per range of a numeric column, e.g. a bitrate histogram
+        
+        Args:
+            name (str): Key of NUMERIC_COLUMNS
+            bins (list): Bin edges, ascending
+            mask (numpy.ndarray): Optional boolean mask of tracks to include
+        
+        Returns:
+            list: Number of tracks in each bin
+        """
+        values = self.column(name)
+        if mask is not None:
+            values = values[mask]
+        counts, _ = np.histogram(values, bins=bins)
+        return counts.tolist()
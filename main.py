@@ -167,4 +167,7 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Metadata worker processes of frozen builds start through here
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
@@ -188,42 +188,617 @@ Metadata module for extracting and handling audio file metadata
 
 import os
 import io
-from PyQt5.QtCore import QObject, pyqtSignal
+import sys
+import base64
+import hashlib
+import time
+import queue
+import signal
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap
 import mutagen
 from mutagen.mp3 import MP3
-from mutagen.flac import FLAC
+from mutagen.flac import FLAC, Picture
 from mutagen.wave import WAVE
 from mutagen.oggvorbis import OggVorbis
 from mutagen.id3 import ID3
 from mutagen.id3._frames import APIC
 from mutagen import File as MutagenFile
 
+from header_reader import HeaderReader, VORBIS_FIELDS
+from thumbnail_cache import ThumbnailCache
+
+class TrackInfo:
+    """
+    Compact metadata record of one track
+    
+    Uses __slots__ instead of a per-track dict, and interns the artist,
+    album, genre and year strings that repeat across a library, so large
+    libraries can be kept in memory cheaply.
+    
+    cover_hash references the embedded cover image by the SHA-1 of its
+    bytes: "" when the file has no cover and None when it is not known yet.
+    partial is True for records read from headers only by the fast scan.
+    """
+    __slots__ = ('file_path', 'title', 'artist', 'album', 'year', 'track', 'genre',
+                 'duration', 'bitrate', 'sample_rate', 'channels', 'layer', 'version',
+                 'file_size', 'cover_hash', 'partial')
+    
+    def __init__(self, file_path, title, artist="Unknown Artist", album="Unknown Album",
+                 year="", track="", genre="", duration=0, bitrate=None, sample_rate=None,
+                 channels=None, layer=None, version=None, file_size=None, cover_hash=None,
+                 partial=None):
+        self.file_path = file_path
+        self.title = title
+        self.artist = sys.intern(artist)
+        self.album = sys.intern(album)
+        self.year = sys.intern(year)
+        self.track = track
+        self.genre = sys.intern(genre)
+        self.duration = duration
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.layer = layer
+        self.version = version
+        self.file_size = file_size
+        self.cover_hash = cover_hash
+        self.partial = partial
+    
+    def __repr__(self):
+        return f"TrackInfo({self.file_path!r}, {self.title!r}, {self.artist!r})"
+    
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a record from a metadata dict, e.g. one stored in the library index
+        
+        Args:
+            data (dict): Metadata keyed by field name; unknown keys are ignored
+            
+        Returns:
+            TrackInfo: The record
+        """
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+    
+    def to_dict(self):
+        """
+        Convert the record to a dict, leaving out fields that are not set
+        
+        Returns:
+            dict: Metadata keyed by field name
+        """
+        return {key: getattr(self, key) for key in self.__slots__
+                if getattr(self, key) is not None}
+
+# Parser state of a worker process, see _parse_chunk
+_worker_manager = None
+_worker_errors = []
+
+def _parse_timed_out(signum, frame):
+    """SIGALRM handler interrupting a parser that ran over its time budget"""
+    raise TimeoutError("metadata parser timed out")
+
+def _parse_chunk(file_paths, timeout, fast_scan=False):
+    """
+    Worker process body: parse a chunk of files
+    
+    On platforms with interval timers each file gets its own time budget;
+    a file that runs over it falls back to default metadata like any other
+    unreadable file.
+    
+    Args:
+        file_paths (list): Files to parse
+        timeout (float): Seconds allowed per file
+        fast_scan (bool): Read headers only, see MetadataManager.fast_scan
+        
+    Returns:
+        list: (path, TrackInfo, error message or None) tuples
+    """
+    global _worker_manager
+    if _worker_manager is None:
+        _worker_manager = MetadataManager()
+        _worker_manager.error.connect(_worker_errors.append)
+        if hasattr(signal, 'setitimer'):
+            signal.signal(signal.SIGALRM, _parse_timed_out)
+    
+    _worker_manager.fast_scan = fast_scan
+    
+    results = []
+    for file_path in file_paths:
+        del _worker_errors[:]
+        if hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            metadata = _worker_manager._read_metadata(file_path)
+        finally:
+            if hasattr(signal, 'setitimer'):
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        results.append((file_path, metadata, _worker_errors[0] if _worker_errors else None))
+    return results
+
 class MetadataManager(QObject):
     """
     Class to handle extraction and management of audio file metadata
     Supports MP3, FLAC, WAV, and OGG formats
     """
+    metadata_loaded = pyqtSignal(list)  # (path, TrackInfo) pairs from load_metadata_async
+    cover_loaded = pyqtSignal(int, object)  # request id, QImage or None from load_cover_async
     error = pyqtSignal(str)
     
-    def __init__(self):
+    def __init__(self, library_index=None, cache_size=10000, thumbnail_cache=None):
+        """
+        Initialize the metadata manager
+        
+        Args:
+            library_index (LibraryIndex): Optional persistent index used to
+                skip re-parsing files that have not changed
+            cache_size (int): Number of files kept in the in-memory cache
+            thumbnail_cache (ThumbnailCache): Optional cache of scaled album art
+        """
         super().__init__()
+        self.library_index = library_index
+        self.cache_size = cache_size
+        self.thumbnail_cache = thumbnail_cache
+        
+        # path -> (size, mtime, metadata), least recently used first
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Batch extraction settings
+        self.max_workers = os.cpu_count() or 1
+        self.chunk_size = 32  # files per worker task
+        self.parse_timeout = 10.0  # seconds allowed per file
+        self.parallel_threshold = 64  # fewer cache misses are parsed in-process
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Fast scan: read only the tags and stream headers of new files, see
+        # HeaderReader; the full parse fills in exact values once fast_scan
+        # is turned off again or the cover is needed
+        self.fast_scan = False
+        self.header_reader = HeaderReader()
+        
+        # Background loader feeding metadata_loaded
+        self.load_interval = 0.1  # seconds between metadata_loaded emissions
+        self._load_queue = queue.Queue()
+        self._load_thread = None
+        
+        # Background cover decoder feeding cover_loaded, newest request only
+        self._cover_condition = threading.Condition()
+        self._cover_request = 0  # id of the newest request
+        self._cover_pending = None  # (id, path, size name, stat) not yet started
+        self._cover_thread = None
     
-    def get_metadata(self, file_path):
+    def get_metadata(self, file_path, file_stat=None):
         """
         Extract metadata from various audio formats (MP3, FLAC, WAV, OGG)
         
+        Lookups go through two cache tiers. Recently used files are served
+        from memory without touching the disk; stale entries are dropped
+        through invalidate() or when file_stat no longer matches. Behind it,
+        metadata stored in the library index is reused while the file's
+        size and mtime are unchanged.
+        
         Args:
             file_path (str): Path to the audio file
+            file_stat (tuple): Optional (size, mtime) the caller already
+                knows, e.g. from the scan, which saves a stat call
             
         Returns:
-            dict: Metadata including title, artist, album, etc.
+            TrackInfo: Metadata including title, artist, album, etc.
         """
-        try:
-            if not os.path.exists(file_path):
+        metadata, file_stat = self._lookup(file_path, file_stat)
+        if metadata is not None:
+            return metadata
+        if file_stat is None:
+            return self._create_default_metadata(file_path)
+        
+        metadata = self._read_metadata(file_path)
+        self._remember(file_path, file_stat, metadata)
+        return metadata
+    
+    def get_metadata_batch(self, file_paths, file_stats=None):
+        """
+        Get metadata for many files, parsing cache misses in worker processes
+        
+        Cached files are yielded first. The rest are split into chunks of
+        chunk_size files and parsed on a process pool; results are yielded
+        as each chunk completes, so callers can show them while the rest is
+        still being parsed. A file that hangs the parser runs into
+        parse_timeout, and a file that crashes its worker process is
+        isolated by retrying the affected chunks one file at a time; either
+        way it gets default metadata and the batch carries on.
+        
+        Blocks while waiting for workers, so call it off the GUI thread.
+        
+        Args:
+            file_paths (list): Paths to the audio files
+            file_stats (dict): Optional path -> (size, mtime) from the scan
+            
+        Yields:
+            tuple: (path, TrackInfo) in completion order
+        """
+        file_stats = file_stats or {}
+        missing = []
+        for file_path in file_paths:
+            metadata, file_stat = self._lookup(file_path, file_stats.get(file_path))
+            if metadata is not None:
+                yield file_path, metadata
+            elif file_stat is None:
+                yield file_path, self._create_default_metadata(file_path)
+            else:
+                missing.append((file_path, file_stat))
+        
+        if len(missing) < self.parallel_threshold or self.max_workers < 2:
+            for file_path, file_stat in missing:
+                metadata = self._read_metadata(file_path)
+                self._remember(file_path, file_stat, metadata)
+                yield file_path, metadata
+            return
+        
+        stats = dict(missing)
+        for file_path, metadata in self._parse_parallel([path for path, _ in missing]):
+            self._remember(file_path, stats[file_path], metadata)
+            yield file_path, metadata
+    
+    def get_cached_metadata(self, file_path, file_stat=None):
+        """
+        Get metadata only if it is cached in memory or in the library index
+        
+        Args:
+            file_path (str): Path to the audio file
+            file_stat (tuple): Optional (size, mtime) the caller already knows
+            
+        Returns:
+            TrackInfo: Cached metadata, or None if the file has to be parsed
+        """
+        metadata, _ = self._lookup(file_path, file_stat)
+        return metadata
+    
+    def load_metadata_async(self, file_paths, file_stats=None):
+        """
+        Extract metadata for files on a background thread
+        
+        Files are run through get_metadata_batch and the results arrive
+        through metadata_loaded in batches. Requests made while a batch is
+        running are merged into the next one.
+        
+        Args:
+            file_paths (list): Paths to the audio files
+            file_stats (dict): Optional path -> (size, mtime) from the scan
+        """
+        self._load_queue.put((list(file_paths), dict(file_stats or {})))
+        if self._load_thread is None:
+            self._load_thread = threading.Thread(target=self._run_loader, daemon=True)
+            self._load_thread.start()
+    
+    def _run_loader(self):
+        """Loader thread body: serve load_metadata_async requests"""
+        while True:
+            file_paths, file_stats = self._load_queue.get()
+            while True:
+                try:
+                    more_paths, more_stats = self._load_queue.get_nowait()
+                except queue.Empty:
+                    break
+                file_paths.extend(more_paths)
+                file_stats.update(more_stats)
+            
+            batch = []
+            last_emit = time.monotonic()
+            try:
+                for item in self.get_metadata_batch(file_paths, file_stats):
+                    batch.append(item)
+                    now = time.monotonic()
+                    if now - last_emit >= self.load_interval:
+                        self.metadata_loaded.emit(batch)
+                        batch = []
+                        last_emit = now
+            except Exception as e:
+                self.error.emit(f"Error extracting metadata: {str(e)}")
+            if batch:
+                self.metadata_loaded.emit(batch)
+    
+    def load_cover_async(self, file_path, size_name, file_stat=None, track=None):
+        """
+        Decode and scale album art on a background thread
+        
+        The QImage arrives through cover_loaded; only the GUI thread may turn
+        it into a QPixmap. Only the newest request is served: one still
+        waiting when another arrives is dropped, and the result of one that
+        was overtaken while decoding is never emitted.
+        
+        Args:
+            file_path (str): Path to the audio file
+            size_name (str): Key of ThumbnailCache.SIZES, e.g. 'panel'
+            file_stat (tuple): Optional (size, mtime) the caller already knows
+            track (tuple): (TrackInfo, cover bytes) from get_track() if the
+                caller parsed the file already; it is not parsed again
+            
+        Returns:
+            int: Request id that cover_loaded reports the image with
+        """
+        with self._cover_condition:
+            self._cover_request += 1
+            self._cover_pending = (self._cover_request, file_path, size_name, file_stat, track)
+            if self._cover_thread is None:
+                self._cover_thread = threading.Thread(target=self._run_cover_loader, daemon=True)
+                self._cover_thread.start()
+            self._cover_condition.notify()
+            return self._cover_request
+    
+    def cancel_cover_requests(self):
+        """Drop any pending or running load_cover_async request"""
+        with self._cover_condition:
+            self._cover_request += 1
+            self._cover_pending = None
+    
+    def _run_cover_loader(self):
+        """Cover thread body: serve the newest load_cover_async request"""
+        while True:
+            with self._cover_condition:
+                while self._cover_pending is None:
+                    self._cover_condition.wait()
+                request_id, file_path, size_name, file_stat, track = self._cover_pending
+                self._cover_pending = None
+            
+            try:
+                image = self.get_cover_image(file_path, size_name, file_stat, track)
+            except Exception as e:
+                self.error.emit(f"Error loading album art: {str(e)}")
+                image = None
+            
+            with self._cover_condition:
+                if request_id != self._cover_request:
+                    continue
+            self.cover_loaded.emit(request_id, image)
+    
+    def _parse_parallel(self, file_paths):
+        """
+        Parse files on the process pool, isolating crashes and hangs
+        
+        When a worker dies, every chunk in flight fails with the pool, so
+        their files are retried one per task; a file that fails again is
+        run alone before it is blamed.
+        
+        Yields:
+            tuple: (path, TrackInfo) in completion order
+        """
+        chunks = deque(file_paths[i:i + self.chunk_size]
+                       for i in range(0, len(file_paths), self.chunk_size))
+        suspects = deque()  # files to run alone after failing next to others
+        pending = {}  # future -> (chunk, ran alone)
+        
+        while chunks or suspects or pending:
+            executor = self._get_executor()
+            try:
+                if suspects and not pending:
+                    chunk = [suspects.popleft()]
+                    future = executor.submit(_parse_chunk, chunk, self.parse_timeout,
+                                             self.fast_scan)
+                    pending[future] = (chunk, True)
+                # Two chunks per worker keep every process busy between results
+                while chunks and not suspects and len(pending) < 2 * self.max_workers:
+                    future = executor.submit(_parse_chunk, chunks[0], self.parse_timeout,
+                                             self.fast_scan)
+                    pending[future] = (chunks.popleft(), False)
+            except BrokenProcessPool:
+                # Broke since the last results came in, pending futures report it
+                if not pending:
+                    self._reset_executor()
+                    continue
+            
+            # Workers time out each file themselves; this catches hangs they can't interrupt
+            longest = max(len(chunk) for chunk, _ in pending.values())
+            done, _ = wait(pending, timeout=self.parse_timeout * (longest + 1),
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                self._reset_executor(terminate=True)
+                continue
+            
+            for future in done:
+                chunk, alone = pending.pop(future)
+                try:
+                    results = future.result()
+                except (BrokenProcessPool, OSError):
+                    self._reset_executor()
+                    if len(chunk) > 1:
+                        chunks.extend([file_path] for file_path in chunk)
+                        continue
+                    if not alone:
+                        suspects.append(chunk[0])
+                        continue
+                    self.error.emit(f"Error extracting metadata: {chunk[0]} crashed or hung the parser")
+                    results = [(chunk[0], self._create_default_metadata(chunk[0]), None)]
+                
+                for file_path, metadata, error in results:
+                    if error:
+                        self.error.emit(error)
+                    yield file_path, metadata
+    
+    def _get_executor(self):
+        """Get the worker process pool, starting it if needed"""
+        with self._executor_lock:
+            if self._executor is None:
+                # Fresh interpreters: forking would copy the GUI's threads and Qt state
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+    
+    def _reset_executor(self, terminate=False):
+        """Drop a broken or stalled process pool so the next call starts a new one"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        if terminate:
+            # The executor API cannot stop a running task, so stop its processes
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def shutdown(self):
+        """Stop the worker processes used by get_metadata_batch"""
+        self._reset_executor(terminate=True)
+    
+    def _lookup(self, file_path, file_stat):
+        """
+        Look a file up in the in-memory cache and then in the library index
+        
+        Returns:
+            tuple: (TrackInfo or None, (size, mtime) or None if the file is missing)
+        """
+        with self._cache_lock:
+            cached = self._cache.get(file_path)
+            if cached is not None and (file_stat is None or tuple(file_stat) == cached[:2]):
+                self._cache.move_to_end(file_path)
+                if cached[2].partial and not self.fast_scan:
+                    return None, cached[:2]
+                return cached[2], cached[:2]
+        
+        if file_stat is None:
+            try:
+                stat_info = os.stat(file_path)
+            except OSError:
                 self.error.emit(f"File not found: {file_path}")
-                return self._create_default_metadata(file_path)
+                return None, None
+            file_stat = (stat_info.st_size, stat_info.st_mtime)
+        size, mtime = file_stat
+        
+        if self.library_index is not None:
+            stored = self.library_index.get_metadata(file_path, size, mtime)
+            if stored is not None:
+                metadata = TrackInfo.from_dict(stored)
+                self._remember(file_path, file_stat, metadata, store=False)
+                if metadata.partial and not self.fast_scan:
+                    return None, file_stat
+                return metadata, file_stat
+        
+        return None, file_stat
+    
+    def _remember(self, file_path, file_stat, metadata, store=True):
+        """Put parsed metadata in the in-memory cache and, if store, the index"""
+        size, mtime = file_stat
+        if store and self.library_index is not None:
+            self.library_index.store_metadata(file_path, size, mtime, metadata.to_dict())
+        
+        with self._cache_lock:
+            self._cache[file_path] = (size, mtime, metadata)
+            self._cache.move_to_end(file_path)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def invalidate(self, file_paths):
+        """
+        Drop files from the in-memory cache, e.g. after they changed on disk
+        
+        Args:
+            file_paths (list): Paths whose cached metadata is stale
+        """
+        with self._cache_lock:
+            for file_path in file_paths:
+                self._cache.pop(file_path, None)
+    
+    def get_track(self, file_path, file_stat=None):
+        """
+        Get metadata and the embedded cover of a file with at most one parse
+        
+        Tags, stream info and the cover all come out of the same parse.
+        When the cached metadata already says the file has no cover, the
+        file is not opened at all.
+        
+        Args:
+            file_path (str): Path to the audio file
+            file_stat (tuple): Optional (size, mtime) the caller already knows
             
+        Returns:
+            tuple: (TrackInfo, cover image bytes or None)
+        """
+        metadata, file_stat = self._lookup(file_path, file_stat)
+        if metadata is not None and metadata.cover_hash == "":
+            return metadata, None
+        if file_stat is None:
+            return self._create_default_metadata(file_path), None
+        
+        metadata, cover = self._read_track(file_path)
+        self._remember(file_path, file_stat, metadata)
+        return metadata, cover
+    
+    def _read_metadata(self, file_path):
+        """
+        Parse metadata from the file itself
+        
+        With fast_scan, only the tags and stream headers are read where the
+        format allows it, and the record is marked partial.
+        
+        Args:
+            file_path (str): Path to the audio file
+            
+        Returns:
+            TrackInfo: Metadata including title, artist, album, etc.
+        """
+        if self.fast_scan:
+            fields = self.header_reader.read(file_path)
+            if fields is not None:
+                data = self._create_default_metadata(file_path).to_dict()
+                data.update(fields, partial=True)
+                return TrackInfo.from_dict(data)
+        return self._read_track(file_path)[0]
+    
+    @staticmethod
+    def _cover_data(audio):
+        """
+        Get the embedded cover image from an already parsed file
+        
+        Args:
+            audio: Parsed mutagen file
+            
+        Returns:
+            bytes: Encoded image data, or None if there is no cover
+        """
+        # FLAC PICTURE blocks
+        pictures = getattr(audio, 'pictures', None)
+        if pictures:
+            return pictures[0].data
+        
+        tags = getattr(audio, 'tags', None)
+        if not tags:
+            return None
+        
+        # ID3 APIC frames (MP3, WAV)
+        if isinstance(tags, ID3):
+            for frame in tags.getall('APIC'):
+                return frame.data
+            return None
+        
+        # Vorbis comments carry a base64 encoded FLAC picture block (OGG)
+        try:
+            blocks = tags.get('METADATA_BLOCK_PICTURE')
+            if blocks:
+                return Picture(base64.b64decode(blocks[0])).data
+        except Exception:
+            pass
+        return None
+    
+    def _read_track(self, file_path):
+        """
+        Parse metadata and the embedded cover from the file itself
+        
+        Args:
+            file_path (str): Path to the audio file
+            
+        Returns:
+            tuple: (TrackInfo, cover image bytes or None)
+        """
+        try:
             # Load appropriate audio handler based on file extension
             file_ext = os.path.splitext(file_path.lower())[1]
             audio = None
@@ -241,7 +816,7 @@ class MetadataManager(QObject):
                 audio = MutagenFile(file_path)
             
             if audio is None:
-                return self._create_default_metadata(file_path)
+                return self._create_default_metadata(file_path), None
             
             # Default metadata with filename as fallback
             metadata = self._create_default_metadata(file_path)
@@ -253,66 +828,77 @@ class MetadataManager(QObject):
                 # ID3 tags use different formats depending on version
                 # Try to extract common tags
                 if "TIT2" in tags:  # Title
-                    metadata['title'] = str(tags["TIT2"])
+                    metadata.title = str(tags["TIT2"])
                 
                 if "TPE1" in tags:  # Artist
-                    metadata['artist'] = str(tags["TPE1"])
+                    metadata.artist = sys.intern(str(tags["TPE1"]))
                 
                 if "TALB" in tags:  # Album
-                    metadata['album'] = str(tags["TALB"])
+                    metadata.album = sys.intern(str(tags["TALB"]))
                 
                 if "TDRC" in tags:  # Year
-                    metadata['year'] = str(tags["TDRC"])
+                    metadata.year = sys.intern(str(tags["TDRC"]))
                 
                 if "TRCK" in tags:  # Track number
-                    metadata['track'] = str(tags["TRCK"])
+                    metadata.track = str(tags["TRCK"])
                 
                 if "TCON" in tags:  # Genre
-                    metadata['genre'] = str(tags["TCON"])
+                    metadata.genre = sys.intern(str(tags["TCON"]))
+                
+                # Vorbis comments (FLAC, OGG); the first value of each name
+                if isinstance(audio, (FLAC, OggVorbis)):
+                    for name, field in VORBIS_FIELDS.items():
+                        values = tags.get(name)
+                        if values and values[0]:
+                            setattr(metadata, field, sys.intern(values[0]))
             
             # Add duration
             if hasattr(audio, 'info') and hasattr(audio.info, 'length'):
-                metadata['duration'] = int(audio.info.length)
+                metadata.duration = int(audio.info.length)
             
             # Add audio quality information if available
             if hasattr(audio, 'info'):
                 # Handle different audio format attributes safely
                 try:
                     if hasattr(audio.info, 'bitrate'):
-                        metadata['bitrate'] = audio.info.bitrate // 1000  # kbps
+                        metadata.bitrate = audio.info.bitrate // 1000  # kbps
                     
                     # MP3 specific info
                     if isinstance(audio, MP3):
-                        metadata['sample_rate'] = audio.info.sample_rate  # Hz
-                        metadata['channels'] = 2 if audio.info.mode != 3 else 1
-                        metadata['layer'] = audio.info.layer
-                        metadata['version'] = audio.info.version
+                        metadata.sample_rate = audio.info.sample_rate  # Hz
+                        metadata.channels = 2 if audio.info.mode != 3 else 1
+                        metadata.layer = audio.info.layer
+                        metadata.version = audio.info.version
                     
                     # Generic attributes for other formats
                     else:
                         if hasattr(audio.info, 'sample_rate'):
-                            metadata['sample_rate'] = audio.info.sample_rate
+                            metadata.sample_rate = audio.info.sample_rate
                         if hasattr(audio.info, 'channels'):
-                            metadata['channels'] = audio.info.channels
+                            metadata.channels = audio.info.channels
                 except Exception:
                     # Ignore errors in audio quality extraction
                     pass
             
             # Add file size
             try:
-                metadata['file_size'] = os.path.getsize(file_path) // 1024  # KB
+                metadata.file_size = os.path.getsize(file_path) // 1024  # KB
             except:
                 pass
+            
+            # Reference the cover so later lookups know whether there is one
+            cover = self._cover_data(audio)
+            metadata.cover_hash = hashlib.sha1(cover).hexdigest() if cover else ""
                 
-            return metadata
+            return metadata, cover
             
         except Exception as e:
             self.error.emit(f"Error extracting metadata: {str(e)}")
-            return self._create_default_metadata(file_path)
+            return self._create_default_metadata(file_path), None
     
     def get_album_art(self, file_path):
         """
-        Extract album art from audio files (MP3, FLAC, OGG)
+        Extract album art from audio files (MP3, FLAC, WAV, OGG)
         
         Args:
             file_path (str): Path to the audio file
@@ -325,52 +911,88 @@ class MetadataManager(QObject):
                 self.error.emit(f"File not found: {file_path}")
                 return None
             
-            file_ext = os.path.splitext(file_path.lower())[1]
-            img_data = None
+            _, cover = self.get_track(file_path)
+            return self.cover_to_pixmap(cover)
             
-            # Extract album art based on file format
-            if file_ext == '.mp3':
-                # MP3 files - look for APIC frames in ID3 tags
-                try:
-                    audio = ID3(file_path)
-                    for tag in audio.values():
-                        if isinstance(tag, APIC):
-                            img_data = tag.data
-                            break
-                except Exception:
-                    pass
-                    
-            elif file_ext == '.flac':
-                # FLAC files - look for PICTURE blocks
-                try:
-                    audio = FLAC(file_path)
-                    if audio.pictures:
-                        img_data = audio.pictures[0].data
-                except Exception:
-                    pass
-                    
-            elif file_ext == '.ogg':
-                # OGG files - look for METADATA_BLOCK_PICTURE
-                try:
-                    audio = OggVorbis(file_path)
-                    if 'METADATA_BLOCK_PICTURE' in audio:
-                        import base64
-                        picture_data = base64.b64decode(audio['METADATA_BLOCK_PICTURE'][0])
-                        img_data = picture_data
-                except Exception:
-                    pass
+        except Exception as e:
+            # Not all audio files have embedded art, so this is not always an error
+            return None
+    
+    def get_cover_image(self, file_path, size_name, file_stat=None, track=None):
+        """
+        Get the album art of a file scaled for display
+        
+        With a thumbnail cache, a cover that was seen before (by this file or
+        any other track sharing it) is loaded pre-scaled without parsing the
+        audio file or decoding the full-size image.
+        
+        Args:
+            file_path (str): Path to the audio file
+            size_name (str): Key of ThumbnailCache.SIZES, e.g. 'panel'
+            file_stat (tuple): Optional (size, mtime) the caller already knows
+            track (tuple): (TrackInfo, cover bytes) from get_track() if the
+                caller parsed the file already
             
-            # Convert image data to QPixmap if found
-            if img_data:
-                qimg = QImage()
-                qimg.loadFromData(img_data)
-                return QPixmap.fromImage(qimg)
+        Returns:
+            QImage: The scaled cover, or None if the file has none
+        """
+        if track is None:
+            metadata, _ = self._lookup(file_path, file_stat)
+        else:
+            metadata = track[0]
+        if metadata is not None and metadata.cover_hash == "":
+            return None
+        if metadata is not None and metadata.cover_hash:
+            image = self.get_cached_cover(metadata.cover_hash, size_name)
+            if image is not None:
+                return image
+        
+        # Parse only if the caller has not done so already
+        metadata, cover = track if track is not None else self.get_track(file_path, file_stat)
+        if not cover:
+            return None
+        if self.thumbnail_cache is not None:
+            return self.thumbnail_cache.put(metadata.cover_hash, cover).get(size_name)
+        
+        # No cache: decode and scale for this call only
+        image = QImage()
+        if not image.loadFromData(cover):
+            return None
+        pixels = ThumbnailCache.SIZES[size_name]
+        return image.scaled(pixels, pixels, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    
+    def get_cached_cover(self, cover_hash, size_name):
+        """
+        Get a cover from the thumbnail cache only
+        
+        Args:
+            cover_hash (str): TrackInfo.cover_hash of a track
+            size_name (str): Key of ThumbnailCache.SIZES
             
+        Returns:
+            QImage: The scaled cover, or None if it is not cached
+        """
+        if self.thumbnail_cache is None or not cover_hash:
             return None
+        return self.thumbnail_cache.get(cover_hash, size_name)
+    
+    @staticmethod
+    def cover_to_pixmap(cover):
+        """
+        Decode cover image bytes as returned by get_track
+        
+        Args:
+            cover (bytes): Encoded image data, or None
             
-        except Exception as e:
-            # Not all audio files have embedded art, so this is not always an error
+        Returns:
+            QPixmap: The decoded image, or None if there is none
+        """
+        if not cover:
+            return None
+        qimg = QImage()
+        if not qimg.loadFromData(cover):
             return None
+        return QPixmap.fromImage(qimg)
     
     def _create_default_metadata(self, file_path):
         """
@@ -380,7 +1002,7 @@ class MetadataManager(QObject):
             file_path (str): Path to the file
             
         Returns:
-            dict: Basic metadata with filename
+            TrackInfo: Basic metadata with filename
         """
         filename = os.path.basename(file_path)
         name, _ = os.path.splitext(filename)
@@ -394,14 +1016,5 @@ class MetadataManager(QObject):
             artist = parts[0].strip()
             title = parts[1].strip()
         
-        return {
-            'title': title,
-            'artist': artist,
-            'album': "Unknown Album",
-            'year': "",
-            'track': "",
-            'genre': "",
-            'duration': 0,
-            'file_path': file_path
-        }
+        return TrackInfo(file_path, title, artist)
 >>>>>>> 7931bac3b70b4ade7d98445fc1a06d706a28aa92
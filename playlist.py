@@ -121,50 +121,226 @@ Playlist management module
 """
 
 import os
+import re
+import sys
 import json
+from functools import partial
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from playlist_formats import is_playlist_file, read_playlist, write_playlist
+
+# Start of a playlist file as written by save_playlists
+HEADER_PATTERN = re.compile(r'\s*\{\s*"name"\s*:\s*("(?:[^"\\]|\\.)*")\s*,\s*"count"\s*:\s*(\d+)')
+
+# Value of the 'encoding' key of front-coded track lists
+FRONT_CODED = "front-coded"
+
+def encode_tracks(tracks):
+    """
+    Front-code a track list
+    
+    Each path is stored as the length of the prefix it shares with the
+    previous path plus the rest of it. Tracks of one album usually follow
+    each other, so most entries shrink to a file name.
+    
+    Args:
+        tracks (list): Track paths
+    
+    Returns:
+        dict: 'encoding', 'shared' (prefix lengths) and 'suffixes' keys
+    """
+    shared = []
+    suffixes = []
+    previous = ""
+    for path in tracks:
+        length = len(os.path.commonprefix((previous, path)))
+        shared.append(length)
+        suffixes.append(path[length:])
+        previous = path
+    return {'encoding': FRONT_CODED, 'shared': shared, 'suffixes': suffixes}
+
+def decode_tracks(data):
+    """
+    Get the track list of playlist data
+    
+    Paths are interned, so playlists holding the same track share one
+    string.
+    
+    Args:
+        data (dict): Playlist data with a plain 'tracks' list or the keys
+            written by encode_tracks()
+    
+    Returns:
+        list: Track paths
+    """
+    encoding = data.get('encoding')
+    if encoding is None:
+        return [sys.intern(path) for path in data.get('tracks', [])]
+    if encoding != FRONT_CODED:
+        raise ValueError(f"Unknown track list encoding: {encoding}")
+    
+    tracks = []
+    previous = ""
+    for length, suffix in zip(data['shared'], data['suffixes']):
+        previous = sys.intern(previous[:length] + suffix)
+        tracks.append(previous)
+    return tracks
+
 class Playlist(QObject):
     """
     Class to represent a single playlist with tracks
+    
+    The tracks are an ordered set: a list of file paths plus a map from
+    each path to its position, so membership and index lookups take
+    constant time. The list must only be changed through these methods,
+    which also mark the playlist as modified since it was last saved.
+    
+    A playlist read from disk may be deferred: only its track count is
+    known until the tracks are first needed, when its loader is called.
     """
     
     def __init__(self, name="New Playlist"):
         super().__init__()
         self.name = name
-        self.tracks = []  # List of file paths
+        self._tracks = []  # List of file paths
+        self._positions = {}  # file path -> index in tracks
+        self._loader = None  # Returns the tracks of a deferred playlist
+        self._track_count = 0  # Track count of a deferred playlist
+        self.modified = True  # Changed since last saved or loaded
+    
+    def __contains__(self, track_path):
+        self.load()
+        return track_path in self._positions
+    
+    @property
+    def tracks(self):
+        """List of file paths, loaded on first access"""
+        self.load()
+        return self._tracks
+    
+    def defer(self, loader, track_count):
+        """
+        Leave the tracks unloaded until they are needed
+        
+        Args:
+            loader (callable): Returns the list of track paths
+            track_count (int): Number of tracks, reported until loaded
+        """
+        self._tracks = []
+        self._positions = {}
+        self._loader = loader
+        self._track_count = track_count
+        self.modified = False
+    
+    def is_loaded(self):
+        """Check whether the tracks have been loaded"""
+        return self._loader is None
+    
+    def load(self):
+        """Load the tracks of a deferred playlist"""
+        if self._loader is None:
+            return
+        loader, self._loader = self._loader, None
+        self.add_tracks(loader())
+        self.modified = False
+    
+    def _reindex(self, start=0):
+        """Update the positions of the tracks from start on"""
+        positions = self._positions
+        for index in range(start, len(self.tracks)):
+            positions[self.tracks[index]] = index
     
     def add_track(self, track_path):
-        """Add a track to the playlist"""
-        if track_path not in self.tracks:
-            self.tracks.append(track_path)
+        """
+        Add a track to the playlist unless it is already there
+        
+        Returns:
+            bool: True if the track was added
+        """
+        self.load()
+        if track_path in self._positions:
+            return False
+        self._positions[track_path] = len(self.tracks)
+        self.tracks.append(track_path)
+        self.modified = True
+        return True
+    
+    def add_tracks(self, track_paths):
+        """
+        Add tracks to the end of the playlist, skipping those already there
+        
+        Args:
+            track_paths (iterable): Paths to track files
+        
+        Returns:
+            int: Number of tracks added
+        """
+        tracks = self.tracks
+        positions = self._positions
+        start = len(tracks)
+        for track_path in track_paths:
+            if track_path not in positions:
+                positions[track_path] = len(tracks)
+                tracks.append(track_path)
+        if len(tracks) > start:
+            self.modified = True
+        return len(tracks) - start
     
     def remove_track(self, index):
         """Remove a track by index"""
         if 0 <= index < len(self.tracks):
+            del self._positions[self.tracks[index]]
             del self.tracks[index]
+            self._reindex(index)
+            self.modified = True
+    
+    def _swap(self, first, second):
+        """Swap the tracks at two indexes"""
+        tracks = self.tracks
+        tracks[first], tracks[second] = tracks[second], tracks[first]
+        self._positions[tracks[first]] = first
+        self._positions[tracks[second]] = second
+        self.modified = True
     
     def move_track_up(self, index):
         """Move a track up in the playlist"""
         if 0 < index < len(self.tracks):
-            self.tracks[index], self.tracks[index-1] = self.tracks[index-1], self.tracks[index]
+            self._swap(index, index - 1)
     
     def move_track_down(self, index):
         """Move a track down in the playlist"""
         if 0 <= index < len(self.tracks) - 1:
-            self.tracks[index], self.tracks[index+1] = self.tracks[index+1], self.tracks[index]
+            self._swap(index, index + 1)
     
     def clear(self):
         """Clear all tracks from the playlist"""
-        self.tracks = []
+        self._tracks = []
+        self._positions = {}
+        self._loader = None
+        self.modified = True
     
     def get_tracks(self):
         """Get all tracks in the playlist"""
         return self.tracks
     
+    def index_of(self, track_path):
+        """
+        Get the index of a track
+        
+        Args:
+            track_path (str): Path to the track file
+        
+        Returns:
+            int: Index of the track, or None if it is not in the playlist
+        """
+        self.load()
+        return self._positions.get(track_path)
+    
     def get_track_count(self):
         """Get the number of tracks in the playlist"""
-        return len(self.tracks)
+        if self._loader is not None:
+            return self._track_count
+        return len(self._tracks)
     
     def get_track_at(self, index):
         """Get track at specific index"""
@@ -175,10 +351,14 @@ class Playlist(QObject):
     def sort_by_filename(self):
         """Sort tracks by filename"""
         self.tracks.sort(key=lambda x: os.path.basename(x).lower())
+        self._reindex()
+        self.modified = True
         
     def sort_by_filepath(self):
         """Sort tracks by full filepath"""
         self.tracks.sort()
+        self._reindex()
+        self.modified = True
         
     def search_tracks(self, search_term):
         """
@@ -197,16 +377,28 @@ class Playlist(QObject):
 class PlaylistManager(QObject):
     """
     Class to manage multiple playlists
+    
+    Next to the playlist files, a manifest records each file's size,
+    modification time, playlist name and track count, so loading reads
+    the names and counts without parsing the track lists.
     """
     playlist_added = pyqtSignal(str)
     playlist_removed = pyqtSignal(str)
     playlist_updated = pyqtSignal(str)
     error = pyqtSignal(str)
     
+    # Manifest file in the playlist directory
+    MANIFEST_FILE = "playlists.manifest"
+    
+    # Bytes read from the start of a file not in the manifest for its header
+    HEADER_BYTES = 4096
+    
     def __init__(self):
         super().__init__()
         self.playlists = {}  # Dictionary of name -> Playlist
         self.current_playlist = None
+        self._saved_files = {}  # playlist name -> file it was last saved to or loaded from
+        self._stale_files = set()  # files of deleted or renamed playlists
         
         # Add a default playlist
         self._add_default_playlist()
@@ -256,8 +448,9 @@ class PlaylistManager(QObject):
                     self.current_playlist = playlist_name
                     break
         
-        # Delete the playlist
+        # Delete the playlist; its file goes on the next save
         del self.playlists[name]
+        self._forget_file(name)
         self.playlist_removed.emit(name)
         return True
     
@@ -285,13 +478,21 @@ class PlaylistManager(QObject):
         if self.current_playlist == old_name:
             self.current_playlist = new_name
         
-        # Delete the old playlist
+        # Delete the old playlist; the next save writes it under the new name
         del self.playlists[old_name]
+        self._forget_file(old_name)
+        self.playlists[new_name].modified = True
         
         self.playlist_removed.emit(old_name)
         self.playlist_added.emit(new_name)
         return True
     
+    def _forget_file(self, name):
+        """Mark the saved file of a playlist for removal on the next save"""
+        file_path = self._saved_files.pop(name, None)
+        if file_path:
+            self._stale_files.add(file_path)
+    
     def get_playlist(self, name):
         """
         Get a playlist by name
@@ -354,45 +555,209 @@ class PlaylistManager(QObject):
     
     def add_tracks_to_playlist(self, playlist_name, track_paths):
         """
-        Add multiple tracks to a playlist
+        Add multiple tracks to a playlist, emitting playlist_updated once
         
         Args:
             playlist_name (str): Name of the playlist
-            track_paths (list): List of paths to track files
+            track_paths (iterable): Paths to track files
         """
         if playlist_name not in self.playlists:
             self.error.emit(f"Playlist '{playlist_name}' does not exist")
             return False
         
-        for track_path in track_paths:
-            self.playlists[playlist_name].add_track(track_path)
-        
+        self.playlists[playlist_name].add_tracks(track_paths)
         self.playlist_updated.emit(playlist_name)
         return True
     
-    def save_playlists(self, directory):
+    @staticmethod
+    def _write_json(file_path, data, compact=False):
+        """
+        Write JSON to a temporary file, then rename it over file_path, so a
+        crash never leaves a truncated file
+        """
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            else:
+                json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    
+    def _read_manifest(self, directory):
+        """
+        Read the manifest of a playlist directory
+        
+        Returns:
+            dict: File name -> [size, mtime_ns, playlist name, track count],
+                empty if there is no readable manifest
+        """
+        try:
+            with open(os.path.join(directory, self.MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest.get('files', {}) if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_manifest(self, directory, files):
+        """Write the manifest of a playlist directory, see _read_manifest()"""
+        self._write_json(os.path.join(directory, self.MANIFEST_FILE),
+                         {'version': 1, 'files': files}, compact=True)
+    
+    @staticmethod
+    def _manifest_entry(file_path, name, track_count):
+        """Create the manifest entry of a playlist file"""
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns, name, track_count]
+    
+    def _read_header(self, file_path):
+        """
+        Read the name and track count from the start of a playlist file
+        
+        Returns:
+            tuple: (name, track count), or None if the file does not start
+                with them, like files written before counts were stored
+        """
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            match = HEADER_PATTERN.match(f.read(self.HEADER_BYTES))
+        if not match:
+            return None
+        return json.loads(match.group(1)), int(match.group(2))
+    
+    def _read_tracks(self, file_path):
+        """
+        Read the track list of a playlist file, for deferred playlists
+        
+        Returns:
+            list: Track paths, empty if the file cannot be read
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return decode_tracks(json.load(f))
+        except Exception as e:
+            self.error.emit(f"Error loading playlist {os.path.basename(file_path)}: {str(e)}")
+            return []
+    
+    def import_playlist(self, file_path):
+        """
+        Add a playlist from a file
+        
+        M3U, M3U8 and PLS files are streamed line by line into the new
+        playlist and named after the file; other files are read as JSON
+        playlists (.json or .rpl) with a plain or front-coded track list.
+        
+        Args:
+            file_path (str): Playlist file
+        
+        Returns:
+            str: Name of the new playlist, or None on failure
+        """
+        try:
+            if is_playlist_file(file_path):
+                name = os.path.splitext(os.path.basename(file_path))[0]
+                tracks = read_playlist(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    playlist_data = json.load(f)
+                name = playlist_data.get('name') or os.path.splitext(os.path.basename(file_path))[0]
+                tracks = decode_tracks(playlist_data)
+            
+            if name in self.playlists:
+                self.error.emit(f"Playlist '{name}' already exists")
+                return None
+            playlist = Playlist(name)
+            playlist.add_tracks(tracks)
+        except Exception as e:
+            self.error.emit(f"Error importing playlist {os.path.basename(file_path)}: {str(e)}")
+            return None
+        
+        self.playlists[name] = playlist
+        self.playlist_added.emit(name)
+        return name
+    
+    def export_playlist(self, name, file_path):
+        """
+        Write a playlist to a file, readable by older versions and other
+        players
+        
+        The extension picks the format: M3U, M3U8 or PLS, written in
+        batches of lines, or else a JSON playlist (.json or .rpl) with a
+        plain track list.
+        
+        Args:
+            name (str): Name of the playlist
+            file_path (str): File to write
+        """
+        playlist = self.playlists.get(name)
+        if playlist is None:
+            self.error.emit(f"Playlist '{name}' does not exist")
+            return False
+        
+        try:
+            if is_playlist_file(file_path):
+                write_playlist(file_path, playlist.tracks)
+            else:
+                self._write_json(file_path, {'name': playlist.name, 'tracks': playlist.tracks})
+            return True
+        except Exception as e:
+            self.error.emit(f"Error exporting playlist: {str(e)}")
+            return False
+    
+    def save_playlists(self, directory, compact=False):
         """
-        Save all playlists to JSON files in the given directory
+        Save the playlists modified since the last save to JSON files in
+        the given directory, and remove the files of deleted playlists
+        
+        Each file is written to a temporary file first and then renamed
+        over the old one, so a crash never leaves a truncated playlist.
+        The directory's manifest is updated to match.
         
         Args:
             directory (str): Directory to save playlists in
+            compact (bool): Write front-coded track lists (see
+                encode_tracks()) as JSON without indentation or spaces
         """
         try:
             os.makedirs(directory, exist_ok=True)
+            manifest = self._read_manifest(directory)
+            changed = False
             
-            # Save each playlist
+            # Save each changed playlist
             for name, playlist in self.playlists.items():
                 file_path = os.path.join(directory, f"{name}.json")
+                if not playlist.modified and self._saved_files.get(name) == file_path:
+                    continue
                 
-                # Create playlist data
+                # Create playlist data; name and count first, for _read_header()
+                tracks = playlist.tracks
                 playlist_data = {
                     'name': playlist.name,
-                    'tracks': playlist.tracks
+                    'count': len(tracks)
                 }
+                if compact:
+                    playlist_data.update(encode_tracks(tracks))
+                else:
+                    playlist_data['tracks'] = tracks
+                
+                self._write_json(file_path, playlist_data, compact)
+                manifest[os.path.basename(file_path)] = self._manifest_entry(
+                    file_path, playlist.name, len(tracks))
+                changed = True
                 
-                # Write to file
-                with open(file_path, 'w') as f:
-                    json.dump(playlist_data, f, indent=4)
+                playlist.modified = False
+                self._saved_files[name] = file_path
+            
+            # Remove the files of deleted and renamed playlists
+            saved = set(self._saved_files.values())
+            for file_path in self._stale_files - saved:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                changed |= manifest.pop(os.path.basename(file_path), None) is not None
+            self._stale_files = set()
+            
+            if changed:
+                self._write_manifest(directory, manifest)
             
             return True
         
@@ -404,6 +769,11 @@ class PlaylistManager(QObject):
         """
         Load playlists from JSON files in the given directory
         
+        Only names and track counts are read, from the manifest or from
+        the start of each file; each playlist's tracks are loaded when it
+        is first used. Files without a count are read in full once and
+        added to the manifest.
+        
         Args:
             directory (str): Directory to load playlists from
         """
@@ -414,6 +784,8 @@ class PlaylistManager(QObject):
             
             # Clear existing playlists
             self.playlists = {}
+            self._saved_files = {}
+            self._stale_files = set()
             
             # Find playlist files
             playlist_files = [f for f in os.listdir(directory) if f.endswith('.json')]
@@ -423,24 +795,43 @@ class PlaylistManager(QObject):
                 self._add_default_playlist()
                 return True
             
+            manifest = self._read_manifest(directory)
+            entries = {}
+            
             # Load each playlist
             for file_name in playlist_files:
                 file_path = os.path.join(directory, file_name)
                 
                 try:
-                    with open(file_path, 'r') as f:
-                        playlist_data = json.load(f)
+                    entry = manifest.get(file_name)
+                    stat = os.stat(file_path)
+                    if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+                        header = entry[2:]
+                    else:
+                        header = self._read_header(file_path)
                     
-                    # Create playlist
-                    name = playlist_data.get('name', os.path.splitext(file_name)[0])
-                    playlist = Playlist(name)
-                    
-                    # Add tracks
-                    for track in playlist_data.get('tracks', []):
-                        playlist.add_track(track)
+                    if header:
+                        # Create playlist, tracks to follow
+                        name, track_count = header
+                        playlist = Playlist(name)
+                        playlist.defer(partial(self._read_tracks, file_path), track_count)
+                    else:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            playlist_data = json.load(f)
+                        
+                        # Create playlist
+                        name = playlist_data.get('name', os.path.splitext(file_name)[0])
+                        playlist = Playlist(name)
+                        
+                        # Add tracks
+                        playlist.add_tracks(decode_tracks(playlist_data))
+                        playlist.modified = False
+                    entries[file_name] = [stat.st_size, stat.st_mtime_ns,
+                                          name, playlist.get_track_count()]
                     
                     # Add to playlists
                     self.playlists[name] = playlist
+                    self._saved_files[name] = file_path
                     
                     # Signal playlist added
                     self.playlist_added.emit(name)
@@ -448,6 +839,12 @@ class PlaylistManager(QObject):
                 except Exception as e:
                     self.error.emit(f"Error loading playlist {file_name}: {str(e)}")
             
+            if entries != manifest:
+                try:
+                    self._write_manifest(directory, entries)
+                except OSError:
+                    pass  # Read-only directory; files are read again next time
+            
             # If no playlists were loaded, create default
             if not self.playlists:
                 self._add_default_playlist()
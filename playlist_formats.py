@@ -0,0 +1,153 @@
+"""
+Playlist formats module for streaming M3U, M3U8 and PLS files
+"""
+
+import os
+import re
+from itertools import islice
+from urllib.parse import unquote, urlsplit
+
+# Playlist file extensions read and written by this module
+EXTENSIONS = ('.m3u', '.m3u8', '.pls')
+
+# Entries resolved and lines written per batch
+BATCH_SIZE = 10000
+
+# Text encoding of all playlist files: M3U8 is UTF-8 by definition, and
+# plain M3U and PLS files declare none. Bytes that are not valid UTF-8,
+# e.g. in file names from another locale, are kept as surrogates both
+# ways, so such tracks survive a round trip instead of failing the export.
+ENCODING = 'utf-8'
+ENCODING_ERRORS = 'surrogateescape'
+
+# "File<n>=<path>" lines of a PLS file
+PLS_FILE_PATTERN = re.compile(r'file\d+=', re.IGNORECASE)
+
+# Entries starting with a drive ("C:\") or a UNC share ("\\server")
+WINDOWS_PATH_PATTERN = re.compile(r'[A-Za-z]:\\|\\\\')
+
+def _is_windows_path(entry):
+    """Check whether an entry looks like a path written on Windows"""
+    return bool(WINDOWS_PATH_PATTERN.match(entry)) or "/" not in entry
+
+def is_playlist_file(file_path):
+    """Check whether a file is an M3U, M3U8 or PLS playlist by its extension"""
+    return os.path.splitext(file_path)[1].lower() in EXTENSIONS
+
+def iter_entries(file_path):
+    """
+    Read the entries of an M3U, M3U8 or PLS file one line at a time
+    
+    Args:
+        file_path (str): Playlist file
+    
+    Yields:
+        str: Entries as written in the file, possibly relative or URLs
+    """
+    pls = file_path.lower().endswith('.pls')
+    # utf-8-sig skips the byte order mark some players write
+    with open(file_path, 'r', encoding='utf-8-sig', errors=ENCODING_ERRORS) as f:
+        for line in f:
+            line = line.strip()
+            if pls:
+                match = PLS_FILE_PATTERN.match(line)
+                if match:
+                    yield line[match.end():].strip()
+            elif line and not line.startswith('#'):
+                yield line
+
+def resolve_entries(entries, base_dir):
+    """
+    Turn playlist entries into absolute file paths, a batch at a time
+    
+    Relative entries are taken relative to base_dir, file:// URLs are
+    converted to paths and other URLs are kept as they are. On systems
+    other than Windows, backslashes become separators only in entries
+    that look like Windows paths: a drive, a UNC share or no "/" at all.
+    Elsewhere a backslash is part of the file name.
+    
+    Args:
+        entries (iterable): Entries from iter_entries()
+        base_dir (str): Directory of the playlist file
+    
+    Yields:
+        str: Track paths or URLs
+    """
+    prefix = os.path.join(os.path.abspath(base_dir), "")
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        for entry in batch:
+            if "://" in entry:
+                url = urlsplit(entry)
+                if url.scheme.lower() != 'file':
+                    yield entry
+                    continue
+                entry = unquote(url.path)
+            if os.sep != "\\" and "\\" in entry and _is_windows_path(entry):
+                # Windows separators in a playlist from another system
+                entry = entry.replace("\\", os.sep)
+            if not os.path.isabs(entry):
+                entry = prefix + entry
+            if "/." in entry or "\\." in entry:
+                entry = os.path.normpath(entry)
+            yield entry
+
+def read_playlist(file_path):
+    """
+    Stream the tracks of an M3U, M3U8 or PLS file
+    
+    Args:
+        file_path (str): Playlist file
+    
+    Yields:
+        str: Absolute track paths or URLs, in playlist order
+    """
+    return resolve_entries(iter_entries(file_path), os.path.dirname(file_path))
+
+def _format_lines(file_path, tracks):
+    """
+    Get the lines of a playlist file
+    
+    Yields:
+        str: Lines, each ending with a newline
+    """
+    if file_path.lower().endswith('.pls'):
+        yield "[playlist]\n"
+        count = 0
+        for count, track in enumerate(tracks, 1):
+            yield f"File{count}={track}\n"
+        yield f"NumberOfEntries={count}\n"
+        yield "Version=2\n"
+    else:
+        yield "#EXTM3U\n"
+        for track in tracks:
+            yield f"{track}\n"
+
+def write_playlist(file_path, tracks):
+    """
+    Write tracks to an M3U, M3U8 or PLS file in batches of lines
+    
+    The file is written to a temporary file first and then renamed, so a
+    failed export never leaves a truncated playlist; the temporary file is
+    removed if anything goes wrong.
+    
+    Args:
+        file_path (str): Playlist file; the extension picks the format
+        tracks (iterable): Track paths
+    """
+    temp_path = f"{file_path}.tmp"
+    lines = _format_lines(file_path, tracks)
+    try:
+        with open(temp_path, 'w', encoding=ENCODING, errors=ENCODING_ERRORS) as f:
+            while True:
+                batch = "".join(islice(lines, BATCH_SIZE))
+                if not batch:
+                    break
+                f.write(batch)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
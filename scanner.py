@@ -0,0 +1,637 @@
+"""
+Scanner module for walking music library directories
+"""
+
+import os
+import re
+import json
+import heapq
+import queue
+import fnmatch
+import hashlib
+import itertools
+import threading
+
+class ScanRules:
+    """
+    Include/exclude glob rules for one library root
+    
+    A rule without a slash matches file and directory names anywhere below
+    the root (".git", "*.als", "Stems"); a rule with a slash matches the
+    path relative to the root ("Projects/*/Bounces"). Matching ignores case.
+    Excluded directories are pruned before they are read. When include
+    rules are given, only files matching one of them are reported.
+    
+    All rules of a kind are compiled into a single regular expression, so
+    each check is one match call no matter how many rules there are.
+    """
+    
+    def __init__(self, root, include=(), exclude=()):
+        """
+        Compile the rules for a root
+        
+        Args:
+            root (str): Library root the relative rules are anchored at
+            include (iterable): Glob patterns files must match, if any
+            exclude (iterable): Glob patterns of files and directories to skip
+        """
+        self.root = os.path.normpath(root)
+        self.include = [p for p in (p.strip() for p in include) if p]
+        self.exclude = [p for p in (p.strip() for p in exclude) if p]
+        self._prefix_len = len(os.path.join(self.root, ""))
+        self._include = self._compile(self.include)
+        self._exclude = self._compile(self.exclude)
+        
+        # Directory summaries remember the rules their listing was filtered by
+        if self.include or self.exclude:
+            rules = json.dumps([sorted(self.include), sorted(self.exclude)])
+            self.fingerprint = hashlib.sha1(rules.encode('utf-8')).hexdigest()[:16]
+        else:
+            self.fingerprint = ""
+    
+    @staticmethod
+    def _compile(patterns):
+        """Compile glob patterns into one regex matched against relative paths"""
+        if not patterns:
+            return None
+        
+        parts = []
+        for pattern in patterns:
+            pattern = pattern.replace("\\", "/").strip("/")
+            regex = fnmatch.translate(pattern)
+            if "/" not in pattern:
+                # Name rules may match below any directory
+                regex = "(?:.*/)?" + regex
+            parts.append(regex)
+        return re.compile("|".join(parts), re.IGNORECASE)
+    
+    def _relative(self, path):
+        """Path below the root with forward slashes"""
+        relative = path[self._prefix_len:]
+        if os.sep != "/":
+            relative = relative.replace(os.sep, "/")
+        return relative
+    
+    def excludes_dir(self, path):
+        """
+        Check whether a directory should be pruned
+        
+        Args:
+            path (str): Directory below the root
+            
+        Returns:
+            bool: True if the directory and everything in it is skipped
+        """
+        return self._exclude is not None and self._exclude.match(self._relative(path)) is not None
+    
+    def accepts_file(self, path):
+        """
+        Check whether a music file should be reported
+        
+        Args:
+            path (str): File below the root
+            
+        Returns:
+            bool: True if the file passes the rules
+        """
+        relative = self._relative(path)
+        if self._exclude is not None and self._exclude.match(relative):
+            return False
+        return self._include is None or self._include.match(relative) is not None
+
+class ScanFrontier:
+    """
+    Thread-safe priority queue of directories waiting to be read
+    
+    Directories are handed out breadth-first, shallowest first, so the top
+    of the library fills before deep subtrees are explored. Directories on
+    the path to one the UI asked for jump ahead of everything else.
+    """
+    
+    def __init__(self):
+        self._heap = []
+        self._entries = {}  # path -> sequence number of its live heap entry
+        self._in_flight = {}  # path -> (mtime, depth) of directories being read
+        self._priority_dirs = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def _is_priority(self, path):
+        """Check whether a directory leads to or lies below a requested one"""
+        for directory in self._priority_dirs:
+            if (path == directory or path.startswith(directory + os.sep)
+                    or directory.startswith(path + os.sep)):
+                return True
+        return False
+    
+    def push(self, path, mtime, depth):
+        """
+        Queue a directory
+        
+        Args:
+            path (str): Directory path
+            mtime (float): The directory's mtime
+            depth (int): Depth below its library root
+            
+        Returns:
+            bool: False if the directory was already queued or being read
+        """
+        with self._lock:
+            if path in self._entries or path in self._in_flight:
+                return False
+            seq = next(self._seq)
+            priority = 0 if self._is_priority(path) else 1
+            self._entries[path] = seq
+            heapq.heappush(self._heap, (priority, depth, seq, path, mtime))
+            return True
+    
+    def pop(self):
+        """
+        Take the most urgent directory
+        
+        Returns:
+            tuple: (path, mtime, depth), or None if nothing is queued
+        """
+        with self._lock:
+            while self._heap:
+                _, depth, seq, path, mtime = heapq.heappop(self._heap)
+                # Skip entries superseded by prioritize()
+                if self._entries.get(path) == seq:
+                    del self._entries[path]
+                    self._in_flight[path] = (mtime, depth)
+                    return path, mtime, depth
+            return None
+    
+    def complete(self, path):
+        """
+        Mark a popped directory as fully processed
+        
+        Args:
+            path (str): Directory returned by pop()
+        """
+        with self._lock:
+            self._in_flight.pop(path, None)
+    
+    def prioritize(self, directory):
+        """
+        Move a directory, its subtree and its ancestors to the front
+        
+        Args:
+            directory (str): Directory the UI wants to see first
+        """
+        directory = os.path.normpath(directory)
+        with self._lock:
+            self._priority_dirs.append(directory)
+            boosted = [entry for entry in self._heap
+                       if entry[0] != 0 and self._entries.get(entry[3]) == entry[2]
+                       and self._is_priority(entry[3])]
+            for _, depth, _, path, mtime in boosted:
+                seq = next(self._seq)
+                self._entries[path] = seq
+                heapq.heappush(self._heap, (0, depth, seq, path, mtime))
+    
+    def pending(self):
+        """
+        Get the directories that still have to be processed
+        
+        Includes directories that were popped but not completed yet, so a
+        checkpoint taken mid-walk loses nothing.
+        
+        Returns:
+            list: (path, mtime, depth) tuples
+        """
+        with self._lock:
+            pending = [(entry[3], entry[4], entry[1]) for entry in self._heap
+                       if self._entries.get(entry[3]) == entry[2]]
+            pending.extend((path, mtime, depth)
+                           for path, (mtime, depth) in self._in_flight.items())
+            return pending
+
+class LibraryScanner:
+    """
+    Single-pass directory walker used by FileManager's scan worker
+    
+    Walks one or more roots with os.scandir and reports every music file
+    together with its stat data. When a library index is available, each
+    directory's summary (mtime, child count and a digest of child names and
+    sizes) is recorded, and directories whose mtime has not moved are not
+    listed again: their file list comes straight from the index.
+    
+    A directory's mtime only changes when its direct entries are added,
+    removed or renamed, not when a file is rewritten in place. Unchanged
+    directories therefore still have their indexed files and subdirectories
+    stat'ed, and a file counts as known only while its size and mtime match
+    the index. A static subtree costs no directory listings, only stats.
+    The summaries and indexed files of each root are loaded with one range
+    query per table before the walk, not queried directory by directory.
+    
+    Pending directories live in a shared ScanFrontier, so shallow folders
+    and folders the UI asked for are read first. With max_workers above
+    one, a bounded set of threads pulls from the frontier concurrently; an
+    idle thread simply takes the next most urgent directory, which keeps
+    all threads busy on uneven trees and slow mounts.
+    """
+    
+    def __init__(self, supported_formats, library_index=None, max_workers=1, rules=None):
+        """
+        Initialize the scanner
+        
+        Args:
+            supported_formats (list): File extensions to report, e.g. '.mp3'
+            library_index (LibraryIndex): Optional index holding directory summaries
+            max_workers (int): Number of threads reading directories
+            rules (list): Optional ScanRules, one per library root
+        """
+        self.extensions = frozenset(fmt.lower() for fmt in supported_formats)
+        self.library_index = library_index
+        self.max_workers = max(1, max_workers)
+        
+        # Deepest roots first so nested roots win over their ancestors
+        self.rules = sorted(rules or [], key=lambda r: len(r.root), reverse=True)
+        
+        # Progress counters
+        self.dirs_seen = 0
+        self.dirs_done = 0
+        self.dirs_skipped = 0
+        self._counter_lock = threading.Lock()
+        
+        # Directories visited by the last walk, summaries not yet stored and
+        # directories completed since the last checkpoint
+        self.visited_dirs = set()
+        self._dir_summaries = []
+        self._completed_dirs = []
+        self.frontier = ScanFrontier()
+        
+        # Index contents of the preloaded roots
+        self._preloaded_roots = []
+        self._known_summaries = {}  # directory -> summary
+        self._known_files = {}  # directory -> indexed (path, size, mtime) tuples
+    
+    def estimate_total(self, found_files):
+        """
+        Estimate the final file count without a separate counting pass
+        
+        Extrapolates from the share of discovered directories already read.
+        
+        Args:
+            found_files (int): Files found so far
+        
+        Returns:
+            int: Estimated total number of files
+        """
+        if not self.dirs_done:
+            return found_files
+        return max(found_files, found_files * self.dirs_seen // self.dirs_done)
+    
+    def take_dir_summaries(self):
+        """
+        Get the directory summaries completed since the last call
+        
+        Summaries are only handed out once all files of the directory have
+        been yielded, so they can be stored after those files.
+        
+        Returns:
+            list: (path, mtime, child_count, digest, subdirs_json) tuples
+        """
+        summaries = self._dir_summaries
+        self._dir_summaries = []
+        return summaries
+    
+    def take_completed_dirs(self):
+        """
+        Get the directories completed since the last call
+        
+        A directory is completed once all of its files have been yielded.
+        
+        Returns:
+            list: Directory paths
+        """
+        completed = self._completed_dirs
+        self._completed_dirs = []
+        return completed
+    
+    def resume(self, pending, completed):
+        """
+        Seed the scanner from a checkpoint before calling walk()
+        
+        Args:
+            pending (list): (path, mtime, depth) tuples still to be read
+            completed (iterable): Directories that were fully processed
+        """
+        self.visited_dirs.update(completed)
+        for path, mtime, depth in pending:
+            self.frontier.push(path, mtime, depth)
+        self.dirs_seen = len(self.visited_dirs) + len(self.frontier)
+        self.dirs_done = len(self.visited_dirs)
+    
+    def preload(self, roots):
+        """
+        Load the directory summaries and indexed files of library roots
+        
+        Called by walk() for its roots; call it before walk() when resuming.
+        Directories outside preloaded roots are looked up one by one.
+        
+        Args:
+            roots (list): Library roots
+        """
+        if self.library_index is None:
+            return
+        for root in roots:
+            root = os.path.normpath(root)
+            if root in self._preloaded_roots:
+                continue
+            self._known_summaries.update(self.library_index.get_dir_summaries_under(root))
+            self._known_files.update(self.library_index.get_dir_files_under(root))
+            self._preloaded_roots.append(root)
+    
+    def _indexed_listing(self, directory):
+        """
+        Get the summary and indexed files of a directory
+        
+        Returns:
+            tuple: (summary or None, list of (path, size, mtime) tuples)
+        """
+        for root in self._preloaded_roots:
+            if directory == root or directory.startswith(root + os.sep):
+                return (self._known_summaries.get(directory),
+                        self._known_files.get(directory, []))
+        summary = self.library_index.get_dir_summary(directory)
+        if summary is None:
+            return None, []
+        return summary, self.library_index.get_files_in_dir(directory)
+    
+    def indexed_under(self, root):
+        """
+        Get what the index held below a root before the walk
+
+        Served from the preloaded listings when the root was preloaded, so
+        pruning after a scan needs no further queries.
+
+        Args:
+            root (str): Library root
+
+        Returns:
+            tuple: (indexed file paths, indexed directory paths)
+        """
+        root = os.path.normpath(root)
+        if root not in self._preloaded_roots:
+            return (self.library_index.get_paths_under(root),
+                    self.library_index.get_dirs_under(root))
+        prefix = os.path.join(root, "")
+        dirs = [path for path in self._known_summaries
+                if path == root or path.startswith(prefix)]
+        paths = [record[0] for directory, records in self._known_files.items()
+                 if directory == root or directory.startswith(prefix)
+                 for record in records]
+        return paths, dirs
+
+    def prioritize(self, directory):
+        """
+        Read a directory (and the directories leading to it) as soon as possible
+        
+        Safe to call from any thread while a walk is running.
+        
+        Args:
+            directory (str): Directory the UI wants to see first
+        """
+        self.frontier.prioritize(directory)
+    
+    def stat_path(self, path):
+        """Stat a path (overridable, e.g. to simulate slow mounts)"""
+        return os.stat(path)
+    
+    def stat_entry(self, entry, follow_symlinks=True):
+        """Stat a DirEntry, reusing its cached data (overridable)"""
+        return entry.stat(follow_symlinks=follow_symlinks)
+    
+    def _rules_for(self, directory):
+        """Get the rules of the root a directory belongs to, if any"""
+        for rules in self.rules:
+            if directory == rules.root or directory.startswith(rules.root + os.sep):
+                return rules
+        return None
+    
+    @staticmethod
+    def _digest(files, subdirs):
+        """Hash the names and sizes of a directory's children"""
+        children = [f"{os.path.basename(path)}\0{size}" for path, size, _ in files]
+        children.extend(f"{name}/" for name in subdirs)
+        children.sort()
+        return hashlib.sha1("\n".join(children).encode('utf-8', 'surrogateescape')).hexdigest()
+    
+    def _read_directory(self, current, dir_mtime):
+        """
+        Read one directory
+        
+        Args:
+            current (str): Directory path
+            dir_mtime (float): The directory's current mtime
+        
+        Returns:
+            tuple: (files, subdirs, summary) where files are (path, size,
+                mtime, known) tuples, subdirs are (path, mtime) tuples and
+                summary is the new directory summary or None
+        """
+        self.visited_dirs.add(current)
+        
+        rules = self._rules_for(current)
+        fingerprint = rules.fingerprint if rules is not None else ""
+        
+        summary = None
+        indexed_files = []
+        if self.library_index is not None:
+            summary, indexed_files = self._indexed_listing(current)
+        
+        if summary is not None and summary[0] == dir_mtime and summary[4] == fingerprint:
+            # Unchanged directory and rules: reuse the indexed listing
+            subdirs = []
+            for name in summary[3]:
+                subdir = os.path.join(current, name)
+                try:
+                    subdirs.append((subdir, self.stat_path(subdir).st_mtime))
+                except OSError:
+                    continue
+            # Retagged files keep the directory mtime but not their own
+            files = []
+            for path, size, mtime in indexed_files:
+                try:
+                    stat_info = self.stat_path(path)
+                except OSError:
+                    continue
+                files.append((path, stat_info.st_size, stat_info.st_mtime,
+                              stat_info.st_size == size and stat_info.st_mtime == mtime))
+            with self._counter_lock:
+                self.dirs_seen += len(subdirs)
+                self.dirs_done += 1
+                self.dirs_skipped += 1
+            return files, subdirs, None
+        
+        files = []
+        subdirs = []
+        subdir_names = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Excluded subtrees are pruned before descent
+                            if rules is not None and rules.excludes_dir(entry.path):
+                                continue
+                            stat_info = self.stat_entry(entry, follow_symlinks=False)
+                            subdirs.append((entry.path, stat_info.st_mtime))
+                            subdir_names.append(entry.name)
+                            continue
+                        
+                        name = entry.name
+                        if name[name.rfind('.'):].lower() not in self.extensions:
+                            continue
+                        if rules is not None and not rules.accepts_file(entry.path):
+                            continue
+                        
+                        # DirEntry caches its stat result (free on Windows)
+                        stat_info = self.stat_entry(entry)
+                    except OSError:
+                        continue
+                    
+                    files.append((entry.path, stat_info.st_size, stat_info.st_mtime))
+        except OSError:
+            # Unreadable directory, skip it and keep walking
+            with self._counter_lock:
+                self.dirs_done += 1
+            return [], [], None
+        
+        with self._counter_lock:
+            self.dirs_seen += len(subdirs)
+            self.dirs_done += 1
+        
+        if self.library_index is None:
+            return [file + (False,) for file in files], subdirs, None
+        
+        # Files whose stat data matches the index need no index writes
+        indexed = {path: (size, mtime) for path, size, mtime in indexed_files}
+        summary = (current, dir_mtime, len(files) + len(subdirs),
+                   self._digest(files, subdir_names), json.dumps(subdir_names), fingerprint)
+        return ([(path, size, mtime, indexed.get(path) == (size, mtime))
+                 for path, size, mtime in files], subdirs, summary)
+    
+    def walk(self, roots, cancel_event=None):
+        """
+        Walk one or more directory trees in a single pass
+        
+        No separate counting pass is needed, and extensions are matched
+        through a set lookup instead of testing every supported format per
+        file. Files arrive in traversal order; callers sort the result.
+        
+        Args:
+            roots (str or list): Root directory or directories to walk, may be
+                empty when the frontier was seeded with resume()
+            cancel_event (threading.Event): Stops the walk when set
+        
+        Yields:
+            tuple: (path, size, mtime, known) for each music file, where known
+                is True when the index already holds this exact record
+        """
+        if isinstance(roots, str):
+            roots = [roots]
+        self.preload(roots)
+        
+        for root in roots:
+            try:
+                if self.frontier.push(root, self.stat_path(root).st_mtime, 0):
+                    self.dirs_seen += 1
+            except OSError:
+                continue
+        
+        if self.max_workers == 1:
+            walker = self._walk_serial(cancel_event)
+        else:
+            walker = self._walk_parallel(cancel_event)
+        
+        for path, files, summary in walker:
+            yield from files
+            if summary is not None:
+                self._dir_summaries.append(summary)
+            self._completed_dirs.append(path)
+            self.frontier.complete(path)
+    
+    def _push_subdirs(self, subdirs, depth):
+        """
+        Queue subdirectories that were not processed or queued already
+        
+        Returns:
+            int: Number of directories queued
+        """
+        queued = 0
+        for subdir, subdir_mtime in subdirs:
+            if subdir not in self.visited_dirs and self.frontier.push(subdir, subdir_mtime, depth + 1):
+                queued += 1
+        return queued
+    
+    def _walk_serial(self, cancel_event):
+        """Priority-ordered walk on the calling thread"""
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            item = self.frontier.pop()
+            if item is None:
+                return
+            path, mtime, depth = item
+            files, subdirs, summary = self._read_directory(path, mtime)
+            self._push_subdirs(subdirs, depth)
+            yield path, files, summary
+    
+    def _walk_parallel(self, cancel_event):
+        """Priority-ordered walk on a bounded pool of threads"""
+        workers = self.max_workers
+        results = queue.Queue()
+        stop = threading.Event()
+        idle = threading.Condition()
+        outstanding = [len(self.frontier)]  # directories queued or being read
+        
+        def stopped():
+            return stop.is_set() or (cancel_event is not None and cancel_event.is_set())
+        
+        def run():
+            try:
+                while not stopped():
+                    item = self.frontier.pop()
+                    if item is None:
+                        with idle:
+                            if outstanding[0] == 0:
+                                break
+                            idle.wait(0.05)
+                        continue
+                    
+                    path, mtime, depth = item
+                    try:
+                        files, subdirs, summary = self._read_directory(path, mtime)
+                    except Exception:
+                        files, subdirs, summary = [], [], None
+                    queued = self._push_subdirs(subdirs, depth)
+                    results.put((path, files, summary))
+                    
+                    with idle:
+                        outstanding[0] += queued - 1
+                        if queued or outstanding[0] == 0:
+                            idle.notify_all()
+            finally:
+                results.put(None)
+        
+        threads = [threading.Thread(target=run, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        
+        try:
+            finished = 0
+            while finished < workers:
+                item = results.get()
+                if item is None:
+                    finished += 1
+                elif not stopped():
+                    yield item
+        finally:
+            stop.set()
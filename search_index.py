@@ -0,0 +1,401 @@
+"""
+Search index module for answering library searches without scanning every track
+"""
+
+import os
+import re
+import heapq
+from array import array
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def _edit_distances(term, word, bound):
+    """
+    Optimal string alignment distance (edits plus adjacent transpositions)
+    
+    Args:
+        term (str): Query word
+        word (str): Vocabulary word
+        bound (int): Largest distance of interest
+    
+    Returns:
+        tuple: (distance to word, smallest distance to a prefix of word),
+            each bound + 1 if it is larger than bound
+    """
+    too_far = bound + 1
+    before = None
+    previous = list(range(len(word) + 1))
+    for i in range(1, len(term) + 1):
+        current = [i] + [0] * len(word)
+        for j in range(1, len(word) + 1):
+            cost = term[i - 1] != word[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and term[i - 1] == word[j - 2]
+                    and term[i - 2] == word[j - 1]):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > bound:
+            return too_far, too_far
+        before, previous = previous, current
+    # The last row holds the distance to every prefix of word
+    return min(previous[-1], too_far), min(min(previous), too_far)
+
+class SearchIndex:
+    """
+    Token and trigram index over track titles, artists, albums and file names
+    
+    Each track is a document with an integer id, and each distinct word a
+    word id. Postings are kept as compact int arrays in ascending id order:
+    
+    - word -> documents containing it
+    - first one or two characters of a word -> documents
+    - trigram -> words containing it
+    
+    A run of word characters can only occur inside a single word, so a
+    query term is looked up in the (much smaller) vocabulary through the
+    trigram table, and the postings of the words containing it are merged.
+    Terms shorter than three characters match the start of a word instead.
+    Documents must contain every term; per-term results are intersected
+    smallest first.
+    
+    Fuzzy searches also accept words within a small edit distance of a
+    term. The trigram table doubles as the words' n-gram signatures, with
+    the start and end of each word marked: vocabulary words sharing the
+    most trigrams with the term are the candidates, and only those get an
+    edit distance computed.
+    
+    Changing a track adds a new document and retires the old id; retired
+    ids are filtered out of results and dropped when the index is rebuilt.
+    """
+    
+    # Field weights for ranking, in the order fields are stored
+    FIELD_WEIGHTS = (8, 4, 2, 1)  # title, artist, album, file name
+    
+    # Matches scored one by one; broader queries rank by whole-word matches
+    RANK_LIMIT = 2000
+    
+    # Vocabulary words compared by edit distance per fuzzy term at most
+    FUZZY_CANDIDATES = 100
+    
+    def __init__(self):
+        """Create an empty index"""
+        self.clear()
+    
+    def __len__(self):
+        return len(self._docs)
+    
+    def __contains__(self, file_path):
+        return file_path in self._docs
+    
+    def clear(self):
+        """Remove every track"""
+        self._docs = {}  # path -> document id
+        self._paths = []  # document id -> path, None once retired
+        self._texts = []  # document id -> lowercase fields joined by "\0"
+        self._alive = bytearray()  # document id -> 1 while current
+        self._tokens = {}  # word -> document ids
+        self._prefixes = {}  # first one or two characters -> document ids
+        self._words = []  # word id -> word
+        self._word_lengths = array('i')  # word id -> length
+        self._trigrams = {}  # trigram -> word ids, with "\2" and "\3" marking word ends
+    
+    @staticmethod
+    def _fields(file_path, metadata):
+        """Get the lowercase searchable fields of a track"""
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if metadata is None:
+            return (name.lower(), "", "", name.lower())
+        return (metadata.title.lower(), metadata.artist.lower(),
+                metadata.album.lower(), name.lower())
+    
+    def update(self, tracks):
+        """
+        Add tracks or replace their text
+        
+        Args:
+            tracks (list): (path, TrackInfo or None) pairs; tracks without
+                metadata are indexed by their file name
+        """
+        for file_path, metadata in tracks:
+            fields = self._fields(file_path, metadata)
+            doc = self._docs.get(file_path)
+            if doc is not None:
+                if self._texts[doc] == "\0".join(fields):
+                    continue
+                # Forget the old id first; retiring it may rebuild the index
+                del self._docs[file_path]
+                self._retire(doc)
+            self._add(file_path, fields)
+    
+    def _add(self, file_path, fields):
+        """Index a track under a new document id"""
+        doc = len(self._paths)
+        self._docs[file_path] = doc
+        self._paths.append(file_path)
+        self._texts.append("\0".join(fields))
+        self._alive.append(1)
+        
+        tokens = set()
+        for field in fields:
+            tokens.update(TOKEN_PATTERN.findall(field))
+        prefixes = {token[:length] for token in tokens for length in (1, 2)}
+        
+        for token in tokens:
+            postings = self._tokens.get(token)
+            if postings is None:
+                postings = self._tokens[token] = array('i')
+                self._add_word(token)
+            postings.append(doc)
+        for prefix in prefixes:
+            postings = self._prefixes.get(prefix)
+            if postings is None:
+                postings = self._prefixes[prefix] = array('i')
+            postings.append(doc)
+    
+    def _add_word(self, word):
+        """Add a new word to the trigram table of the vocabulary"""
+        word_id = len(self._words)
+        self._words.append(word)
+        self._word_lengths.append(len(word))
+        for trigram in self._signature(word):
+            postings = self._trigrams.get(trigram)
+            if postings is None:
+                postings = self._trigrams[trigram] = array('i')
+            postings.append(word_id)
+    
+    def remove(self, file_paths):
+        """
+        Remove tracks
+        
+        Args:
+            file_paths (list): Paths to remove; unknown paths are ignored
+        """
+        for file_path in file_paths:
+            doc = self._docs.pop(file_path, None)
+            if doc is not None:
+                self._retire(doc)
+    
+    def _retire(self, doc):
+        """Mark a document id as no longer current, rebuilding once most are"""
+        self._alive[doc] = 0
+        self._paths[doc] = None
+        self._texts[doc] = None
+        retired = len(self._paths) - len(self._docs)
+        if retired > 1000 and retired > len(self._docs):
+            self._rebuild()
+    
+    def _rebuild(self):
+        """Re-index the current documents under new, dense ids"""
+        current = [(self._paths[doc], self._texts[doc].split("\0"))
+                   for doc in sorted(self._docs.values()) if self._alive[doc]]
+        self.clear()
+        for file_path, fields in current:
+            self._add(file_path, fields)
+    
+    @staticmethod
+    def _signature(word):
+        """Get the trigrams of a word, including two marking its start and end"""
+        marked = f"\2{word}\3"
+        return {marked[i:i + 3] for i in range(len(marked) - 2)}
+    
+    @staticmethod
+    def _max_edits(length):
+        """Edits a fuzzy term of the given length may be away from a word"""
+        if length < 4:
+            return 0
+        return 1 if length < 7 else 2
+    
+    def _similar_words(self, part):
+        """
+        Find vocabulary words within a few edits of part, or of whose start
+        part is a few edits away (for a word still being typed)
+        
+        Args:
+            part (str): Lowercase run of word characters
+        
+        Returns:
+            dict: Word -> edit distance
+        """
+        max_edits = self._max_edits(len(part))
+        if not max_edits:
+            return {}
+        lists = [self._postings(self._trigrams, trigram) for trigram in self._signature(part)]
+        lists = [postings for postings in lists if len(postings)]
+        if not lists:
+            return {}
+        
+        # Words sharing the most trigrams, long enough to be within reach
+        word_ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+        lengths = np.frombuffer(self._word_lengths, dtype=np.int32)[word_ids]
+        keep = lengths >= len(part) - max_edits
+        word_ids, shared = word_ids[keep], shared[keep]
+        best = np.argsort(-shared, kind='stable')[:self.FUZZY_CANDIDATES]
+        
+        similar = {}
+        for word_id in word_ids[best].tolist():
+            word = self._words[word_id]
+            distance, prefix_distance = _edit_distances(part, word[:len(part) + max_edits],
+                                                        max_edits)
+            if len(word) > len(part) + max_edits:
+                distance = max_edits + 1
+            distance = min(distance, prefix_distance)
+            if distance <= max_edits:
+                similar[word] = distance
+        return similar
+    
+    @staticmethod
+    def _terms(query):
+        """Split a query into lowercase terms"""
+        return [term for term in query.lower().split() if term]
+    
+    def _postings(self, table, key):
+        """Get a posting list as a NumPy view, empty if the key is unknown"""
+        postings = table.get(key)
+        if postings is None:
+            return np.empty(0, dtype=np.int32)
+        return np.frombuffer(postings, dtype=np.int32)
+    
+    @staticmethod
+    def _intersect(small, large):
+        """Intersect two ascending id arrays by binary search of the smaller one"""
+        if not len(small) or not len(large):
+            return small[:0]
+        positions = np.searchsorted(large, small)
+        positions[positions == len(large)] = 0
+        return small[large[positions] == small]
+    
+    def _match_word_part(self, part, similar=None):
+        """
+        Find the documents with a word containing part
+        
+        Args:
+            part (str): Lowercase run of word characters
+            similar (dict): Fuzzy search only: words similar to part are
+                matched too, and stored here as part -> {word: distance}
+        
+        Returns:
+            numpy.ndarray: Ascending document ids, possibly including retired ones
+        """
+        if len(part) < 3:
+            return self._postings(self._prefixes, part)
+        
+        # Words holding every trigram of part, then those holding part itself
+        lists = sorted((self._postings(self._trigrams, part[i:i + 3])
+                        for i in range(len(part) - 2)), key=len)
+        word_ids = lists[0]
+        for postings in lists[1:]:
+            word_ids = self._intersect(word_ids, postings)
+        words = self._words
+        matched = {words[word_id] for word_id in word_ids.tolist() if part in words[word_id]}
+        if similar is not None:
+            similar[part] = self._similar_words(part)
+            matched.update(similar[part])
+        lists = [self._postings(self._tokens, word) for word in matched]
+        
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+    
+    def _candidates(self, terms, similar=None):
+        """Find the current documents containing every term, see _match_word_part"""
+        lists = []
+        checks = []
+        for term in terms:
+            parts = TOKEN_PATTERN.findall(term)
+            if not parts:
+                return np.empty(0, dtype=np.int32)
+            lists.extend(self._match_word_part(part, similar) for part in parts)
+            if parts != [term]:
+                # Spans punctuation or several words, e.g. "ac/dc"
+                checks.append(term)
+        
+        lists.sort(key=len)
+        candidates = lists[0]
+        for postings in lists[1:]:
+            candidates = self._intersect(candidates, postings)
+        alive = np.frombuffer(self._alive, dtype=np.uint8)
+        candidates = candidates[alive[candidates] == 1]
+        
+        if checks:
+            texts = self._texts
+            candidates = np.array([doc for doc in candidates.tolist()
+                                   if all(term in texts[doc] for term in checks)],
+                                  dtype=np.int32)
+        return candidates
+    
+    def _score(self, doc, terms, similar=None):
+        """
+        Rank a matching document: weighted field hits, more for word starts
+        and less for words only similar to a term
+        """
+        score = 0
+        fields = self._texts[doc].split("\0")
+        for term in terms:
+            near = similar.get(term) if similar else None
+            for field, weight in zip(fields, self.FIELD_WEIGHTS):
+                if term in field:
+                    score += weight
+                    if field.startswith(term) or (" " + term) in field:
+                        score += weight
+                elif near:
+                    distance = min((near[word] for word in TOKEN_PATTERN.findall(field)
+                                    if word in near), default=None)
+                    if distance is not None:
+                        score += weight / (distance + 1)
+        return score
+    
+    def search(self, query, limit=200, fuzzy=False):
+        """
+        Find the tracks matching a query, best matches first
+        
+        Every whitespace-separated term must occur in the title, artist,
+        album or file name. Terms of three or more characters match
+        anywhere in a word, shorter ones match the start of a word.
+        
+        Args:
+            query (str): Search text
+            limit (int): Number of results to return at most
+            fuzzy (bool): Also match words a few typos away from terms of
+                four or more characters, ranked below exact matches
+        
+        Returns:
+            tuple: (list of paths, best first; number of tracks matched in total)
+        """
+        terms = self._terms(query)
+        if not terms:
+            return [], 0
+        similar = {} if fuzzy else None
+        candidates = self._candidates(terms, similar)
+        
+        if len(candidates) <= self.RANK_LIMIT:
+            ranked = heapq.nsmallest(limit, candidates.tolist(),
+                                     key=lambda doc: (-self._score(doc, terms, similar), doc))
+        else:
+            # Too broad to score each match: whole-word matches first
+            preferred = candidates
+            for term in terms:
+                preferred = self._intersect(preferred, self._postings(self._tokens, term))
+            ranked = preferred[:limit].tolist()
+            if len(ranked) < limit:
+                rest = np.setdiff1d(candidates, preferred, assume_unique=True)
+                ranked += rest[:limit - len(ranked)].tolist()
+        
+        return [self._paths[doc] for doc in ranked], len(candidates)
+    
+    def matches(self, query):
+        """
+        Find every track matching a query, see search()
+        
+        Args:
+            query (str): Search text
+        
+        Returns:
+            set: Paths of the matching tracks
+        """
+        terms = self._terms(query)
+        if not terms:
+            return set(self._docs)
+        paths = self._paths
+        return {paths[doc] for doc in self._candidates(terms).tolist()}
@@ -0,0 +1,62 @@
+"""
+Tests for the playlist formats module
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playlist_formats import read_playlist, resolve_entries, write_playlist
+
+@unittest.skipIf(os.sep == "\\", "backslashes are separators on Windows")
+class ResolveEntriesTest(unittest.TestCase):
+    """Separator handling of entries written on other systems"""
+    
+    def resolve(self, entry):
+        return list(resolve_entries([entry], "/playlists"))[0]
+    
+    def test_posix_name_with_backslash(self):
+        self.assertEqual(self.resolve("/music/AC\\DC/Back in Black.mp3"),
+                         "/music/AC\\DC/Back in Black.mp3")
+        self.assertEqual(self.resolve("Music/AC\\DC.mp3"), "/playlists/Music/AC\\DC.mp3")
+    
+    def test_windows_relative_path(self):
+        self.assertEqual(self.resolve("Artist\\Album\\01.mp3"),
+                         "/playlists/Artist/Album/01.mp3")
+    
+    def test_windows_drive_and_share(self):
+        self.assertEqual(self.resolve("C:\\Music\\a/b.mp3"), "/playlists/C:/Music/a/b.mp3")
+        self.assertEqual(self.resolve("\\\\server\\share\\a.mp3"), "//server/share/a.mp3")
+
+class WritePlaylistTest(unittest.TestCase):
+    """Exporting playlists"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+    
+    def test_undecodable_name_round_trip(self):
+        track = os.path.join(self.directory, os.fsdecode(b"caf\xe9.mp3"))
+        for name in ("Export.m3u8", "Export.m3u", "Export.pls"):
+            file_path = os.path.join(self.directory, name)
+            write_playlist(file_path, [track])
+            self.assertEqual(list(read_playlist(file_path)), [track])
+    
+    def test_failed_write_leaves_no_files(self):
+        def tracks():
+            yield "/music/a.mp3"
+            raise IOError("disk full")
+        
+        file_path = os.path.join(self.directory, "Export.m3u8")
+        with self.assertRaises(IOError):
+            write_playlist(file_path, tracks())
+        self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == "__main__":
+    unittest.main()
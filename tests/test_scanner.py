@@ -0,0 +1,58 @@
+"""
+Tests for the scanner module
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from library_index import LibraryIndex
+from scanner import LibraryScanner
+
+class RescanTest(unittest.TestCase):
+    """Rescans of directories whose summary is in the index"""
+    
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.album = os.path.join(self.root, "Album")
+        os.makedirs(self.album)
+        self.track = os.path.join(self.album, "01.mp3")
+        with open(self.track, 'wb') as f:
+            f.write(b"x" * 10)
+        self.index = LibraryIndex(os.path.join(self.root, "library.db"))
+    
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def scan(self):
+        """Walk the root and record the result like FileManager does"""
+        scanner = LibraryScanner(['.mp3'], self.index)
+        files = list(scanner.walk(self.root))
+        self.index.update_files([file[:3] for file in files if not file[3]])
+        self.index.store_dir_summaries(scanner.take_dir_summaries())
+        return files, scanner
+    
+    def test_unchanged_directory_is_reused(self):
+        self.scan()
+        files, scanner = self.scan()
+        self.assertEqual(scanner.dirs_skipped, 2)
+        self.assertEqual([(file[0], file[1], file[3]) for file in files], [(self.track, 10, True)])
+    
+    def test_file_rewritten_in_place(self):
+        self.scan()
+        album_mtime = os.stat(self.album).st_mtime
+        with open(self.track, 'wb') as f:
+            f.write(b"x" * 20)
+        os.utime(self.album, (album_mtime, album_mtime))
+        
+        files, scanner = self.scan()
+        self.assertEqual(scanner.dirs_skipped, 2)
+        self.assertEqual([(file[0], file[1], file[3]) for file in files], [(self.track, 20, False)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Tests for the search index module
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metadata import TrackInfo
+from search_index import SearchIndex
+
+def make_tracks(count, artist):
+    """Create (path, TrackInfo) pairs for count tracks by one artist"""
+    return [(f"/music/{i}.mp3", TrackInfo(f"/music/{i}.mp3", f"Song {i}", artist, "Album"))
+            for i in range(count)]
+
+class SearchIndexTest(unittest.TestCase):
+    
+    def test_retagging_rebuilds_index(self):
+        # Retagging retires the old documents until the index is rebuilt
+        index = SearchIndex()
+        index.update([(f"/music/{i}.mp3", None) for i in range(1500)])
+        index.update(make_tracks(1500, "First Artist"))
+        index.update(make_tracks(1500, "Second Artist"))
+        
+        self.assertEqual(index.search("second artist")[1], 1500)
+        self.assertEqual(index.search("first artist")[1], 0)
+        self.assertEqual(index.matches("song 7"), {"/music/7.mp3"} | {
+            f"/music/{i}.mp3" for i in range(1500) if str(i).startswith("7")})
+    
+    def test_remove_after_rebuild(self):
+        index = SearchIndex()
+        index.update(make_tracks(1500, "First Artist"))
+        index.update(make_tracks(1500, "Second Artist"))
+        index.remove(["/music/0.mp3"])
+        self.assertEqual(index.search("second")[1], 1499)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Thumbnail cache module for storing pre-scaled album art on disk
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QDir
+from PyQt5.QtGui import QImage
+
+def default_thumbnail_dir():
+    """
+    Get the default location of the thumbnail cache
+    
+    Returns:
+        str: Path to the thumbnails directory next to config.ini
+    """
+    return os.path.join(QDir.homePath(), ".retromp3player", "thumbnails")
+
+class ThumbnailCache:
+    """
+    Size-bounded on-disk cache of scaled album art
+    
+    Thumbnails are keyed by the SHA-1 of the embedded image bytes (see
+    TrackInfo.cover_hash), so a cover shared by every track of an album is
+    decoded and stored once. Each cover is kept in every size listed in
+    SIZES. When the cache grows past max_bytes the least recently used
+    thumbnails are deleted; file mtimes record the use order across runs.
+    
+    Only QImage is used, so the cache can be filled from any thread.
+    """
+    
+    # Pre-scaled sizes in pixels (bounding square)
+    SIZES = {
+        'panel': 200,  # now-playing panel
+        'icon': 32,    # list icons
+    }
+    
+    def __init__(self, cache_dir=None, max_bytes=64 * 1024 * 1024, memory_items=256):
+        """
+        Open the thumbnail cache
+        
+        Args:
+            cache_dir (str): Directory, defaults to ~/.retromp3player/thumbnails
+            max_bytes (int): Disk space the thumbnails may use
+            memory_items (int): Thumbnails also kept decoded in memory
+        """
+        self.cache_dir = cache_dir or default_thumbnail_dir()
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # (hash, size name) -> QImage
+        
+        # file name -> size in bytes, least recently used first
+        self._files = OrderedDict()
+        self._total_bytes = 0
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.jpg'):
+                    stat_info = entry.stat()
+                    entries.append((stat_info.st_mtime, entry.name, stat_info.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._total_bytes += size
+    
+    def _file_name(self, cover_hash, size_name):
+        """Name of the thumbnail file of a cover in one size"""
+        return f"{cover_hash}-{self.SIZES[size_name]}.jpg"
+    
+    def get(self, cover_hash, size_name):
+        """
+        Get a cached thumbnail
+        
+        Args:
+            cover_hash (str): SHA-1 of the embedded image bytes
+            size_name (str): Key of SIZES
+        
+        Returns:
+            QImage: The thumbnail, or None if it is not cached
+        """
+        key = (cover_hash, size_name)
+        name = self._file_name(cover_hash, size_name)
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                return image
+            if name not in self._files:
+                return None
+            self._files.move_to_end(name)
+        
+        path = os.path.join(self.cache_dir, name)
+        image = QImage(path)
+        if image.isNull():
+            self._forget(name)
+            return None
+        
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember_image(key, image)
+        return image
+    
+    def put(self, cover_hash, image_data):
+        """
+        Decode a cover once and store it in every size
+        
+        Args:
+            cover_hash (str): SHA-1 of image_data
+            image_data (bytes): Encoded image embedded in the audio file
+        
+        Returns:
+            dict: Size name -> QImage, empty if the data cannot be decoded
+        """
+        source = QImage()
+        if not source.loadFromData(image_data):
+            return {}
+        
+        images = {}
+        for size_name, pixels in self.SIZES.items():
+            image = source
+            if image.width() > pixels or image.height() > pixels:
+                image = image.scaled(pixels, pixels, Qt.KeepAspectRatio,
+                                     Qt.SmoothTransformation)
+            images[size_name] = image
+            self._remember_image((cover_hash, size_name), image)
+            
+            name = self._file_name(cover_hash, size_name)
+            path = os.path.join(self.cache_dir, name)
+            # Write then rename so readers never see a partial file
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            if not image.save(temp_path, 'JPG', 90):
+                continue
+            try:
+                os.replace(temp_path, path)
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            
+            with self._lock:
+                self._total_bytes += size - self._files.pop(name, 0)
+                self._files[name] = size
+        self._evict()
+        return images
+    
+    def _remember_image(self, key, image):
+        """Keep a decoded thumbnail in the in-memory tier"""
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+    
+    def _forget(self, name):
+        """Drop a thumbnail file from the cache"""
+        with self._lock:
+            self._total_bytes -= self._files.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+    
+    def _evict(self):
+        """Delete least recently used thumbnails until the cache fits max_bytes"""
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._files:
+                    return
+                name, size = self._files.popitem(last=False)
+                self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
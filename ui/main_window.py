@@ -32,6 +32,7 @@ Main window implementation for RetroJukebox
 
 import os
 import sys
+import bisect
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QTabWidget, QSplitter, QLabel, QPushButton, 
                              QSlider, QFileDialog, QMessageBox, QListWidget,
@@ -45,6 +46,11 @@ from PyQt5.QtSvg import QSvgWidget
 from player import Player
 from file_manager import FileManager
 from metadata import MetadataManager
+from library_index import LibraryIndex
+from library_store import LibraryStore
+from search_index import SearchIndex
+from thumbnail_cache import ThumbnailCache
+from utils.config import ConfigManager
 from playlist import PlaylistManager
 from visualizer import AudioVisualizer
 from themes import ThemeManager
@@ -54,6 +60,13 @@ class MainWindow(QMainWindow):
     """
     Main application window
     """
+    
+    # Library search results shown at most
+    SEARCH_RESULT_LIMIT = 500
+    
+    # File dialog filter for playlist import and export
+    PLAYLIST_FILE_FILTER = ("Playlist Files (*.rpl *.json *.m3u *.m3u8 *.pls);;"
+                            "M3U Playlists (*.m3u *.m3u8);;PLS Playlists (*.pls);;All Files (*)")
 >>>>>>> 7931bac3b70b4ade7d98445fc1a06d706a28aa92
     
     def __init__(self):
@@ -981,8 +994,18 @@ class MainWindow(QMainWindow):
 =======
         # Initialize components
         self.player = Player()
-        self.file_manager = FileManager()
-        self.metadata_manager = MetadataManager()
+        self.config_manager = ConfigManager()
+        self.library_index = LibraryIndex()
+        self.library_store = LibraryStore()
+        self.library_search = SearchIndex()
+        self.playlist_search_index = SearchIndex()
+        self.playlist_items = {}  # track path -> playlist rows showing it
+        self.song_ratings = self.config_manager.get_song_ratings() or {}
+        self.thumbnail_cache = ThumbnailCache()
+        self.file_manager = FileManager(self.library_index, self.config_manager)
+        self.metadata_manager = MetadataManager(self.library_index,
+                                                thumbnail_cache=self.thumbnail_cache)
+        self.metadata_manager.fast_scan = self.config_manager.get_bool("Library", "fast_scan")
         self.playlist_manager = PlaylistManager()
         self.visualizer = AudioVisualizer()
         self.theme_manager = ThemeManager()
@@ -993,6 +1016,10 @@ class MainWindow(QMainWindow):
         # Connect signals
         self.connect_signals()
         
+        # Pick up a library scan that was interrupted by closing the player
+        if self.file_manager.resume_scan():
+            self.statusBar().showMessage("Resuming interrupted library scan...")
+        
         # Start visualizer
         self.visualizer.start()
         
@@ -1053,6 +1080,16 @@ class MainWindow(QMainWindow):
         theme_visual_layout.addWidget(self.theme_visual)
         
         left_layout.addWidget(self.theme_visual_container)
+        
+        # Album art of the playing track, filled with pre-scaled thumbnails
+        art_size = ThumbnailCache.SIZES['panel']
+        self.album_art_label = QLabel()
+        self.album_art_label.setObjectName("albumArtLabel")
+        self.album_art_label.setFixedSize(art_size, art_size)
+        self.album_art_label.setAlignment(Qt.AlignCenter)
+        self.album_art_placeholder = self.create_album_art_placeholder(art_size)
+        self.album_art_request = None  # id of the cover being decoded
+        left_layout.addWidget(self.album_art_label, 0, Qt.AlignHCenter)
         left_layout.addStretch()
         
         # Right side - Track info, controls, visualizer
@@ -1172,22 +1209,36 @@ class MainWindow(QMainWindow):
         self.browse_button.clicked.connect(self.browse_directory)
         
         # Add search functionality
-        from PyQt5.QtWidgets import QLineEdit
+        from PyQt5.QtWidgets import QLineEdit, QCheckBox
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search library...")
         self.search_input.setClearButtonEnabled(True)
         self.search_input.textChanged.connect(self.search_library)
         
+        self.fuzzy_search_check = QCheckBox("Fuzzy")
+        self.fuzzy_search_check.setToolTip("Also find near matches, e.g. misspelt names")
+        self.fuzzy_search_check.setChecked(True)
+        self.fuzzy_search_check.toggled.connect(
+            lambda: self.search_library(self.search_input.text()))
+        
         library_controls_layout.addWidget(self.browse_button)
         library_controls_layout.addWidget(self.search_input)
+        library_controls_layout.addWidget(self.fuzzy_search_check)
         library_controls_layout.addStretch()
         
         # Library list
         self.library_list = QListWidget()
+        self.library_items = {}  # file path -> library list item
         self.library_list.itemDoubleClicked.connect(self.library_item_double_clicked)
         
+        # Ranked search results, shown instead of the library list while searching
+        self.library_results = QListWidget()
+        self.library_results.itemDoubleClicked.connect(self.library_item_double_clicked)
+        self.library_results.hide()
+        
         library_layout.addWidget(library_controls)
         library_layout.addWidget(self.library_list)
+        library_layout.addWidget(self.library_results)
         
         # Playlist tab
         self.playlist_widget = QWidget()
@@ -1270,6 +1321,46 @@ class MainWindow(QMainWindow):
         open_dir_action.triggered.connect(self.browse_directory)
         file_menu.addAction(open_dir_action)
         
+        add_dir_action = QAction("Add Directory to Library...", self)
+        add_dir_action.triggered.connect(self.add_library_directory)
+        file_menu.addAction(add_dir_action)
+        
+        watch_action = QAction("Watch Library for Changes", self)
+        watch_action.setCheckable(True)
+        watch_action.setChecked(self.file_manager.watch_enabled)
+        watch_action.toggled.connect(self.file_manager.set_watch_enabled)
+        file_menu.addAction(watch_action)
+        
+        duplicates_action = QAction("Find Duplicate Tracks...", self)
+        duplicates_action.triggered.connect(self.find_duplicates)
+        file_menu.addAction(duplicates_action)
+        
+        # Library sort orders: (label, columns, descending)
+        sort_menu = file_menu.addMenu("Sort Library By")
+        sort_orders = [
+            ("Artist", ['artist', 'album'], False),
+            ("Album", ['album'], False),
+            ("Genre", ['genre', 'artist', 'album'], False),
+            ("Year (Newest First)", ['year'], True),
+            ("Duration (Longest First)", ['duration'], True),
+            ("Bitrate (Highest First)", ['bitrate'], True),
+            ("Rating (Highest First)", ['rating'], True),
+        ]
+        for label, keys, descending in sort_orders:
+            action = QAction(label, self)
+            action.triggered.connect(lambda checked, k=keys, d=descending: self.sort_library(k, d))
+            sort_menu.addAction(action)
+        
+        rate_menu = file_menu.addMenu("Rate Selected Track")
+        for rating in range(6):
+            action = QAction("★" * rating if rating else "No Rating", self)
+            action.triggered.connect(lambda checked, r=rating: self.rate_selected_track(r))
+            rate_menu.addAction(action)
+        
+        statistics_action = QAction("Library Statistics...", self)
+        statistics_action.triggered.connect(self.show_library_statistics)
+        file_menu.addAction(statistics_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("Exit", self)
@@ -1316,6 +1407,16 @@ class MainWindow(QMainWindow):
         delete_playlist_action.triggered.connect(self.delete_current_playlist)
         playlist_menu.addAction(delete_playlist_action)
         
+        playlist_menu.addSeparator()
+        
+        import_playlist_action = QAction("Import Playlist...", self)
+        import_playlist_action.triggered.connect(self.import_playlist)
+        playlist_menu.addAction(import_playlist_action)
+        
+        export_playlist_action = QAction("Export Playlist...", self)
+        export_playlist_action.triggered.connect(self.export_current_playlist)
+        playlist_menu.addAction(export_playlist_action)
+        
         # Visualization menu
         visualization_menu = menubar.addMenu("Visualization")
         
@@ -1482,12 +1583,18 @@ class MainWindow(QMainWindow):
         self.player.track_error.connect(self.on_track_error)
         
         # File manager signals
+        self.file_manager.scan_started.connect(self.on_scan_started)
+        self.file_manager.scan_batch.connect(self.on_scan_batch)
         self.file_manager.scan_finished.connect(self.on_scan_finished)
+        self.file_manager.library_changed.connect(self.on_library_changed)
+        self.file_manager.duplicates_found.connect(self.on_duplicates_found)
         self.file_manager.scan_progress.connect(self.on_scan_progress)
         self.file_manager.error.connect(self.on_file_manager_error)
         
         # Metadata manager signals
         self.metadata_manager.error.connect(self.on_metadata_error)
+        self.metadata_manager.metadata_loaded.connect(self.on_metadata_loaded)
+        self.metadata_manager.cover_loaded.connect(self.on_cover_loaded)
         
         # Playlist manager signals
         self.playlist_manager.playlist_added.connect(self.on_playlist_added)
@@ -1513,6 +1620,123 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage(f"Scanning directory: {directory}")
             self.file_manager.scan_directory(directory)
     
+    def add_library_directory(self):
+        """Open a dialog to add another music directory to the library"""
+        directory = QFileDialog.getExistingDirectory(self, "Add Music Directory")
+        if directory:
+            roots = self.file_manager.library_roots + [directory]
+            self.statusBar().showMessage(f"Scanning {len(roots)} library directories")
+            self.file_manager.scan_directories(roots)
+    
+    def find_duplicates(self):
+        """Search the library for duplicate rips"""
+        if not self.file_manager.get_files():
+            self.statusBar().showMessage("Scan a music directory first")
+            return
+        self.statusBar().showMessage("Looking for duplicate tracks...")
+        self.file_manager.find_duplicates()
+    
+    def on_duplicates_found(self, groups):
+        """Show the groups of identical tracks"""
+        if not groups:
+            self.statusBar().showMessage("No duplicate tracks found")
+            return
+        
+        wasted = 0
+        for group in groups:
+            details = self.file_manager.get_file_details(group[0])
+            if details:
+                wasted += details['size'] * (len(group) - 1)
+        self.statusBar().showMessage(f"Found {len(groups)} sets of duplicate tracks")
+        
+        box = QMessageBox(self)
+        box.setWindowTitle("Duplicate Tracks")
+        box.setText(f"Found {len(groups)} sets of duplicate tracks "
+                    f"using {wasted / (1024 * 1024):.1f} MB of extra space.")
+        box.setDetailedText("\n\n".join("\n".join(group) for group in groups))
+        box.exec_()
+    
+    def sort_library(self, keys, descending=False):
+        """
+        Reorder the library list by metadata columns
+        
+        Args:
+            keys (list): LibraryStore column names, most significant first
+            descending (bool): Reverse the order
+        """
+        ordered = self.library_store.sort(keys, descending)
+        
+        # Tracks whose tags are still being read go last
+        seen = set(ordered)
+        ordered += [path for path in self.library_items if path not in seen]
+        self.show_library_order(ordered)
+    
+    def show_library_order(self, ordered):
+        """
+        Reorder the library list rows without recreating them
+        
+        Args:
+            ordered (list): Track paths in display order
+        """
+        self.library_list.setUpdatesEnabled(False)
+        while self.library_list.count():
+            self.library_list.takeItem(self.library_list.count() - 1)
+        for file_path in ordered:
+            item = self.library_items.get(file_path)
+            if item is not None:
+                self.library_list.addItem(item)
+        self.library_list.setUpdatesEnabled(True)
+    
+    def rate_selected_track(self, rating):
+        """
+        Rate the track selected in the library list
+        
+        Args:
+            rating (int): 1 to 5 stars, 0 to clear the rating
+        """
+        item = self.library_list.currentItem()
+        if item is None:
+            self.statusBar().showMessage("Select a track in the library first")
+            return
+        
+        file_path = item.data(Qt.UserRole)
+        if rating:
+            self.song_ratings[file_path] = rating
+        else:
+            self.song_ratings.pop(file_path, None)
+        self.config_manager.set_song_ratings(self.song_ratings)
+        
+        # Keep the rating column in step for the next sort by rating
+        self.library_store.set_ratings({file_path: rating})
+        self.statusBar().showMessage(
+            f"Rated {os.path.basename(file_path)}: {'★' * rating or 'no rating'}", 3000)
+    
+    def show_library_statistics(self):
+        """Summarize the library: playing time, genres and bitrates"""
+        store = self.library_store
+        if not len(store):
+            self.statusBar().showMessage("Scan a music directory first")
+            return
+        
+        hours, seconds = divmod(store.total('duration'), 3600)
+        size_gb = store.total('size') / (1024 * 1024)
+        lines = [f"{len(store)} tracks, {hours} h {seconds // 60} min, {size_gb:.1f} GB", ""]
+        
+        genres = store.count_by('genre')
+        lines.append("Tracks per genre:")
+        for genre, count in list(genres.items())[:10]:
+            lines.append(f"  {genre or 'Unknown'}: {count}")
+        
+        bitrate_bins = [0, 1, 128, 192, 256, 320, 100000]
+        labels = ["unknown", "< 128 kbps", "128-191 kbps", "192-255 kbps",
+                  "256-319 kbps", "320+ kbps"]
+        lines += ["", "Bitrates:"]
+        for label, count in zip(labels, store.histogram('bitrate', bitrate_bins)):
+            if count:
+                lines.append(f"  {label}: {count}")
+        
+        QMessageBox.information(self, "Library Statistics", "\n".join(lines))
+    
     def open_file(self):
         """Open a dialog to select a music file"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -1568,19 +1792,30 @@ class MainWindow(QMainWindow):
         Args:
             search_text (str): Text to search for
         """
-        if not search_text:
+        if not search_text.strip():
             # If search is cleared, show all files
-            for i in range(self.library_list.count()):
-                self.library_list.item(i).setHidden(False)
+            self.library_results.hide()
+            self.library_list.show()
             return
-            
-        # Otherwise filter the list
-        for i in range(self.library_list.count()):
-            item = self.library_list.item(i)
-            if search_text.lower() in item.text().lower():
-                item.setHidden(False)
-            else:
-                item.setHidden(True)
+        
+        # Otherwise show the best matches from the search index
+        paths, total = self.library_search.search(search_text, self.SEARCH_RESULT_LIMIT,
+                                                  fuzzy=self.fuzzy_search_check.isChecked())
+        self.library_results.setUpdatesEnabled(False)
+        self.library_results.clear()
+        for file_path in paths:
+            item = self.library_items.get(file_path)
+            result = QListWidgetItem(item.text() if item is not None else os.path.basename(file_path))
+            result.setData(Qt.UserRole, file_path)
+            self.library_results.addItem(result)
+        self.library_results.setUpdatesEnabled(True)
+        
+        self.library_list.hide()
+        self.library_results.show()
+        if total > len(paths):
+            self.statusBar().showMessage(f"Showing the best {len(paths)} of {total} matches")
+        else:
+            self.statusBar().showMessage(f"{total} matches")
     
     def play_next(self):
         """Play the next track in playlist"""
@@ -1597,10 +1832,8 @@ class MainWindow(QMainWindow):
             return
         
         # Find index of current track
-        tracks = current_playlist.get_tracks()
-        try:
-            current_index = tracks.index(current_track)
-        except ValueError:
+        current_index = current_playlist.index_of(current_track)
+        if current_index is None:
             # Current track not in playlist, play first track
             if current_playlist.get_track_count() > 0:
                 self.play_file(current_playlist.get_track_at(0))
@@ -1626,19 +1859,13 @@ class MainWindow(QMainWindow):
         Args:
             search_text (str): Text to search for
         """
-        if not search_text:
-            # If search is cleared, show all files
-            for i in range(self.playlist_list.count()):
-                self.playlist_list.item(i).setHidden(False)
-            return
-            
-        # Otherwise filter the list
+        # Matches come from the index; only rows that change are touched
+        matches = self.playlist_search_index.matches(search_text)
         for i in range(self.playlist_list.count()):
             item = self.playlist_list.item(i)
-            if search_text.lower() in item.text().lower():
-                item.setHidden(False)
-            else:
-                item.setHidden(True)
+            hidden = item.data(Qt.UserRole) not in matches
+            if item.isHidden() != hidden:
+                item.setHidden(hidden)
     
     def sort_playlist_by_name(self):
         """Sort current playlist by filename"""
@@ -1671,10 +1898,8 @@ class MainWindow(QMainWindow):
             return
         
         # Find index of current track
-        tracks = current_playlist.get_tracks()
-        try:
-            current_index = tracks.index(current_track)
-        except ValueError:
+        current_index = current_playlist.index_of(current_track)
+        if current_index is None:
             # Current track not in playlist, play last track
             if current_playlist.get_track_count() > 0:
                 self.play_file(current_playlist.get_track_at(current_playlist.get_track_count() - 1))
@@ -1759,6 +1984,26 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             self.playlist_manager.delete_playlist(current_name)
     
+    def import_playlist(self):
+        """Add a playlist from a file"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Playlist", "", self.PLAYLIST_FILE_FILTER
+        )
+        if file_path:
+            name = self.playlist_manager.import_playlist(file_path)
+            if name:
+                self.playlist_selector.setCurrentText(name)
+                self.statusBar().showMessage(f"Playlist imported: {name}", 3000)
+    
+    def export_current_playlist(self):
+        """Write the current playlist to a file"""
+        current_name = self.playlist_selector.currentText()
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Playlist", f"{current_name}.rpl", self.PLAYLIST_FILE_FILTER
+        )
+        if file_path and self.playlist_manager.export_playlist(current_name, file_path):
+            self.statusBar().showMessage(f"Playlist exported: {file_path}", 3000)
+    
     def change_playlist(self, playlist_name):
         """Change the current active playlist"""
         if playlist_name:
@@ -1780,26 +2025,44 @@ class MainWindow(QMainWindow):
     def update_playlist_content(self):
         """Update the playlist content view"""
         self.playlist_list.clear()
+        self.playlist_items = {}
+        self.playlist_search_index.clear()
         
         current_playlist = self.playlist_manager.get_current_playlist()
         if not current_playlist:
             return
         
-        # Add all tracks to the list
+        # Add all tracks to the list; tracks that still have to be parsed show
+        # their file name until the background loader delivers their tags
+        self.playlist_list.setUpdatesEnabled(False)
+        missing = {}
         for track_path in current_playlist.get_tracks():
-            # Get metadata for the track
-            metadata = self.metadata_manager.get_metadata(track_path)
-            
-            # Create display text
-            if metadata:
-                display_text = f"{metadata['title']} - {metadata['artist']}"
-            else:
-                display_text = os.path.basename(track_path)
+            file_stat = self.file_manager.get_file_stat(track_path)
+            metadata = self.metadata_manager.get_cached_metadata(track_path, file_stat)
+            if metadata is None:
+                missing[track_path] = file_stat
+            self.playlist_search_index.update([(track_path, metadata)])
             
             # Create list item
-            item = QListWidgetItem(display_text)
+            item = QListWidgetItem()
             item.setData(Qt.UserRole, track_path)
+            self.set_playlist_item_metadata(item, track_path, metadata)
             self.playlist_list.addItem(item)
+            self.playlist_items.setdefault(track_path, []).append(item)
+        self.playlist_list.setUpdatesEnabled(True)
+        
+        if missing:
+            self.metadata_manager.load_metadata_async(list(missing), missing)
+    
+    def set_playlist_item_metadata(self, item, track_path, metadata):
+        """Show a track's tags and cached cover icon in a playlist row"""
+        item.setText(self.track_display_text(track_path, metadata))
+        
+        # Cover icon, only if its thumbnail is cached already
+        if metadata and metadata.cover_hash:
+            icon = self.metadata_manager.get_cached_cover(metadata.cover_hash, 'icon')
+            if icon is not None:
+                item.setIcon(QIcon(QPixmap.fromImage(icon)))
     
     def library_item_double_clicked(self, item):
         """Handle double click on library item"""
@@ -1807,7 +2070,7 @@ class MainWindow(QMainWindow):
         if file_path:
             # Also add to current playlist if not already there
             current_playlist = self.playlist_manager.get_current_playlist()
-            if current_playlist and file_path not in current_playlist.get_tracks():
+            if current_playlist and file_path not in current_playlist:
                 self.playlist_manager.add_track_to_playlist(
                     self.playlist_manager.current_playlist, file_path
                 )
@@ -1845,35 +2108,39 @@ class MainWindow(QMainWindow):
     
     def on_track_started(self, track_path):
         """Handle track started playing"""
-        # Update UI
-        metadata = self.metadata_manager.get_metadata(track_path)
+        file_stat = self.file_manager.get_file_stat(track_path)
+        metadata = self.metadata_manager.get_cached_metadata(track_path, file_stat)
+        track = None
+        if metadata is None:
+            # One parse yields the tags and the cover; the cover thread only scales it
+            track = self.metadata_manager.get_track(track_path, file_stat)
+            metadata = track[0]
         
         if metadata:
-            self.track_title_label.setText(metadata['title'])
-            self.artist_label.setText(metadata['artist'])
-            self.album_label.setText(metadata['album'])
+            self.track_title_label.setText(metadata.title)
+            self.artist_label.setText(metadata.artist)
+            self.album_label.setText(metadata.album)
             
             # Format duration
-            duration = metadata.get('duration', 0)
+            duration = metadata.duration
             duration_str = self.format_time(duration)
             self.duration_label.setText(duration_str)
             
             # Display audio quality information
             audio_quality = []
             
-            # Add bitrate if available
-            if 'bitrate' in metadata and metadata['bitrate']:
-                kbps = int(metadata['bitrate'] / 1000)
-                audio_quality.append(f"{kbps} kbps")
+            # Add bitrate if available (already in kbps)
+            if metadata.bitrate:
+                audio_quality.append(f"{metadata.bitrate} kbps")
             
             # Add sample rate if available
-            if 'sample_rate' in metadata and metadata['sample_rate']:
-                sample_rate = int(metadata['sample_rate'] / 1000)
+            if metadata.sample_rate:
+                sample_rate = int(metadata.sample_rate / 1000)
                 audio_quality.append(f"{sample_rate} kHz")
             
             # Add audio mode if available (stereo/mono)
-            if 'mode' in metadata and metadata['mode']:
-                audio_quality.append(metadata['mode'])
+            if metadata.channels:
+                audio_quality.append("Stereo" if metadata.channels > 1 else "Mono")
                 
             # Display the quality info
             if audio_quality:
@@ -1881,15 +2148,16 @@ class MainWindow(QMainWindow):
             else:
                 self.audio_quality_label.setText("")
                 
-            # Update album art display
-            album_art = self.metadata_manager.get_album_art(track_path)
-            if album_art:
-                self.album_art_label.setPixmap(album_art.scaled(
-                    self.album_art_label.width(), 
-                    self.album_art_label.height(),
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                ))
+            # Album art is decoded in the background, show the placeholder meanwhile
+            if metadata.cover_hash == "":
+                self.metadata_manager.cancel_cover_requests()
+                self.album_art_request = None
+                self.album_art_label.clear()
+            else:
+                self.album_art_label.setPixmap(self.album_art_placeholder)
+                self.album_art_request = self.metadata_manager.load_cover_async(
+                    track_path, 'panel', file_stat, track
+                )
             
             # Set slider maximum
             self.position_slider.setMaximum(duration)
@@ -1914,7 +2182,7 @@ class MainWindow(QMainWindow):
         self.playback_controls.pauseButton.setText("Pause")
         
         # Update status bar
-        self.statusBar().showMessage(f"Playing: {metadata['title'] if metadata else os.path.basename(track_path)}")
+        self.statusBar().showMessage(f"Playing: {metadata.title if metadata else os.path.basename(track_path)}")
     
     def on_track_ended(self):
         """Handle track finished playing"""
@@ -1939,34 +2207,206 @@ class MainWindow(QMainWindow):
             self.duration_label.setText(self.format_time(duration))
             self.position_slider.setMaximum(duration)
     
+    def on_cover_loaded(self, request_id, image):
+        """Show album art decoded by the metadata manager"""
+        # A cover for a track that is no longer playing
+        if request_id != self.album_art_request:
+            return
+        self.album_art_request = None
+        
+        if image is not None:
+            self.album_art_label.setPixmap(QPixmap.fromImage(image))
+        else:
+            self.album_art_label.clear()
+    
+    def create_album_art_placeholder(self, size):
+        """
+        Create the image shown while album art is being loaded
+        
+        Args:
+            size (int): Width and height in pixels
+            
+        Returns:
+            QPixmap: A framed music note
+        """
+        pixmap = QPixmap(size, size)
+        pixmap.fill(Qt.transparent)
+        
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.gray)
+        painter.drawRoundedRect(1, 1, size - 2, size - 2, 8, 8)
+        font = painter.font()
+        font.setPixelSize(size // 2)
+        painter.setFont(font)
+        painter.drawText(pixmap.rect(), Qt.AlignCenter, "\u266a")
+        painter.end()
+        return pixmap
+    
     def on_track_error(self, error_message):
         """Handle track playback error"""
         QMessageBox.warning(self, "Playback Error", error_message)
         self.statusBar().showMessage(f"Error: {error_message}")
     
-    def on_scan_finished(self, file_list):
-        """Handle file scanning finished"""
-        # Clear library list
+    def on_scan_started(self, roots):
+        """Handle a new library scan starting"""
+        # Clear library list, results stream in through on_scan_batch
         self.library_list.clear()
+        self.library_items = {}
+        self.library_store.clear()
+        self.library_search.clear()
+        
+        # Results of the old library must not stay clickable
+        self.library_results.clear()
+        self.search_input.clear()
+        self.library_results.hide()
+        self.library_list.show()
+        
+        # Show the folder of the playing track first
+        if self.player.current_track:
+            self.file_manager.prioritize_directory(os.path.dirname(self.player.current_track))
+    
+    def library_display_text(self, file_path):
+        """Build the library list text for a track"""
+        # Get metadata for the file, validated against the scanned stat data
+        metadata = self.metadata_manager.get_metadata(
+            file_path, self.file_manager.get_file_stat(file_path)
+        )
+        return self.track_display_text(file_path, metadata)
+    
+    def track_display_text(self, file_path, metadata):
+        """Format the list text for a track, falling back to its file name"""
+        if metadata:
+            return f"{metadata.title} - {metadata.artist}"
+        return os.path.basename(file_path)
+    
+    def add_library_item(self, file_path, text=None, sorted_position=False):
+        """
+        Add a track to the library list
         
-        # Add all files to the list
+        Args:
+            file_path (str): Track path
+            text (str): List text, built from the track's metadata if None
+            sorted_position (bool): Insert before the next track in path
+                order instead of appending
+        """
+        # Create list item
+        if text is None:
+            text = self.library_display_text(file_path)
+        item = QListWidgetItem(text)
+        item.setData(Qt.UserRole, file_path)
+        
+        row = self.library_list.count()
+        if sorted_position:
+            # FileManager keeps the library paths sorted
+            library_files = self.file_manager.get_files()
+            index = bisect.bisect_right(library_files, file_path)
+            for next_path in library_files[index:]:
+                next_item = self.library_items.get(next_path)
+                if next_item is not None:
+                    row = self.library_list.row(next_item)
+                    break
+        self.library_list.insertItem(row, item)
+        self.library_items[file_path] = item
+    
+    def on_scan_batch(self, file_list):
+        """Handle a batch of files found by the running scan"""
+        # Avoid repainting once per row while the batch is inserted
+        self.library_list.setUpdatesEnabled(False)
+        
+        # Add the batch to the list; tracks that still have to be parsed show
+        # their file name until the background loader delivers their tags
+        missing = {}
+        found = []
         for file_path in file_list:
-            # Get metadata for the file
-            metadata = self.metadata_manager.get_metadata(file_path)
-            
-            # Create display text
-            if metadata:
-                display_text = f"{metadata['title']} - {metadata['artist']}"
+            file_stat = self.file_manager.get_file_stat(file_path)
+            metadata = self.metadata_manager.get_cached_metadata(file_path, file_stat)
+            if metadata is None:
+                missing[file_path] = file_stat
             else:
-                display_text = os.path.basename(file_path)
-            
-            # Create list item
-            item = QListWidgetItem(display_text)
-            item.setData(Qt.UserRole, file_path)
-            self.library_list.addItem(item)
+                found.append((file_path, metadata))
+            self.add_library_item(file_path, self.track_display_text(file_path, metadata))
+        
+        self.library_list.setUpdatesEnabled(True)
+        self.library_store.update(found, self.song_ratings)
+        self.library_search.update((file_path, None) for file_path in missing)
+        self.library_search.update(found)
+        
+        if missing:
+            self.metadata_manager.load_metadata_async(list(missing), missing)
+    
+    def on_metadata_loaded(self, results):
+        """Show tags parsed in the background in the library and playlist"""
+        self.library_list.setUpdatesEnabled(False)
+        self.playlist_list.setUpdatesEnabled(False)
+        library_results = []
+        playlist_results = []
+        for file_path, metadata in results:
+            item = self.library_items.get(file_path)
+            if item is not None:
+                item.setText(self.track_display_text(file_path, metadata))
+                library_results.append((file_path, metadata))
+            items = self.playlist_items.get(file_path)
+            if items:
+                for item in items:
+                    self.set_playlist_item_metadata(item, file_path, metadata)
+                playlist_results.append((file_path, metadata))
+        self.library_list.setUpdatesEnabled(True)
+        self.playlist_list.setUpdatesEnabled(True)
+        self.library_store.update(library_results, self.song_ratings)
+        self.library_search.update(library_results)
+        self.playlist_search_index.update(playlist_results)
+        
+        # Tags re-read after a live update; a running scan commits when done
+        if not self.file_manager.is_scanning():
+            self.library_index.commit()
+    
+    def on_library_changed(self, updated_files, removed_files):
+        """Apply a live library update without rebuilding the list"""
+        self.metadata_manager.invalidate(updated_files + removed_files)
+        self.library_list.setUpdatesEnabled(False)
+        
+        for file_path in removed_files:
+            item = self.library_items.pop(file_path, None)
+            if item is not None:
+                self.library_list.takeItem(self.library_list.row(item))
+        self.library_store.remove(removed_files)
+        self.library_search.remove(removed_files)
+        
+        # New files show their file name and changed ones keep their old
+        # text until the background loader has re-read their tags
+        updated = {}
+        for file_path in updated_files:
+            updated[file_path] = self.file_manager.get_file_stat(file_path)
+            if file_path not in self.library_items:
+                self.add_library_item(file_path, self.track_display_text(file_path, None),
+                                      sorted_position=True)
+                self.library_search.update([(file_path, None)])
+        
+        self.library_list.setUpdatesEnabled(True)
+        self.library_index.commit()
+        if updated:
+            self.metadata_manager.load_metadata_async(list(updated), updated)
+        
+        self.statusBar().showMessage(
+            f"Library updated: {len(updated_files)} added or changed, {len(removed_files)} removed"
+        )
+    
+    def on_scan_finished(self, file_list):
+        """Handle file scanning finished"""
+        # Persist metadata parsed while the library filled
+        self.library_index.commit()
+        
+        # Batches arrive in traversal order; show the merged, sorted library
+        self.show_library_order(file_list)
         
         # Update status bar
-        self.statusBar().showMessage(f"Scan complete: {len(file_list)} files found")
+        message = f"Scan complete: {len(file_list)} files found"
+        first_results = self.file_manager.scan_metrics.get('first_results')
+        if first_results is not None:
+            message += (f" (first {self.file_manager.FIRST_RESULTS_COUNT} tracks "
+                        f"in {first_results * 1000:.0f} ms)")
+        self.statusBar().showMessage(message)
     
     def on_scan_progress(self, current, total):
         """Handle file scanning progress update"""
@@ -2038,7 +2478,11 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close event"""
-        # Clean up resources
+        # Clean up resources; an unfinished scan is checkpointed for next launch
+        self.file_manager.suspend_scan()
+        self.file_manager.stop_watching()
+        self.library_index.commit()
+        self.metadata_manager.shutdown()
         self.player.cleanup()
         self.visualizer.stop()
         
@@ -2093,8 +2537,8 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'current_track') and self.current_track:
             metadata = self.metadata_manager.get_metadata(self.current_track)
             self.visualizer.set_song_info(
-                metadata.get('title', os.path.basename(self.current_track)),
-                metadata.get('artist', 'Unknown Artist'),
-                metadata.get('album', 'Unknown Album')
+                metadata.title or os.path.basename(self.current_track),
+                metadata.artist or 'Unknown Artist',
+                metadata.album or 'Unknown Album'
             )
 >>>>>>> 7931bac3b70b4ade7d98445fc1a06d706a28aa92
@@ -35,6 +35,11 @@ class ConfigManager:
             "Equalizer": {
                 "preset": "Default",
                 "bands": "0,0,0,0,0,0,0,0,0,0",
+            },
+            "Library": {
+                "include": "",
+                "exclude": ".git,.hg,.svn,.thumbnails,@eaDir,*.logicx,*.band",
+                "fast_scan": "False",
             }
         }
         
@@ -110,6 +115,35 @@ class ConfigManager:
         
         self.config[section][key] = str(value)
     
+    def get_library_rules(self, root):
+        """
+        Get the include/exclude glob rules for a library root.
+        
+        The rules in [Library] apply to every root; a [Library:<root>]
+        section adds rules for that root only.
+        
+        Returns:
+            tuple: (include, exclude) lists of glob patterns
+        """
+        include = self._split_patterns(self.get("Library", "include", ""))
+        exclude = self._split_patterns(self.get("Library", "exclude", ""))
+        
+        section = f"Library:{os.path.normpath(root)}"
+        include += self._split_patterns(self.get(section, "include", ""))
+        exclude += self._split_patterns(self.get(section, "exclude", ""))
+        return include, exclude
+    
+    def set_library_rules(self, root, include, exclude):
+        """Set the include/exclude glob rules of a single library root."""
+        section = f"Library:{os.path.normpath(root)}"
+        self.set(section, "include", ",".join(include))
+        self.set(section, "exclude", ",".join(exclude))
+    
+    @staticmethod
+    def _split_patterns(value):
+        """Split a comma separated list of glob patterns."""
+        return [pattern.strip() for pattern in value.split(",") if pattern.strip()]
+    
     def get_last_playlist(self):
         """Get the last used playlist."""
         return self.settings.value("last_playlist", [])